@@ -1,24 +1,4 @@
-import pygame
-
-
-def load_directional_frames(
-    root,
-    prefix,
-    frame_count,
-    frames_per_direction,
-    scale=1.0,
-    direction_order=None,
-):
-    frames = []
-    for index in range(frame_count):
-        image_path = root / f"{prefix}{index:03d}.png"
-        surface = pygame.image.load(str(image_path)).convert_alpha()
-        if scale != 1.0:
-            width = max(1, int(surface.get_width() * scale))
-            height = max(1, int(surface.get_height() * scale))
-            surface = pygame.transform.smoothscale(surface, (width, height))
-        frames.append(surface)
-
+def split_directions(frames, frames_per_direction, direction_order=None):
     directions = [frames[i * frames_per_direction : (i + 1) * frames_per_direction] for i in range(4)]
     if direction_order is not None:
         directions = [directions[i] for i in direction_order]
@@ -32,43 +12,54 @@ def build_idle_frames(walk_frames):
     return idle
 
 
+class AnimationClip:
+    __slots__ = ("frames", "fps", "loop", "duration", "rate")
+
+    def __init__(self, frames, fps=0, loop=True, duration=None):
+        self.frames = frames
+        self.fps = fps
+        self.duration = duration
+        # Frame index is int(time * rate), wrapped for looping clips and clamped otherwise
+        if duration:
+            count = getattr(frames, "frames_per_direction", None)
+            if count is None:
+                count = len(frames[0]) if frames else 0
+            self.rate = count / duration
+            self.loop = False
+        else:
+            self.rate = fps if fps > 0 else 0
+            self.loop = loop
+
+    def frame(self, direction, time):
+        frames = self.frames[direction]
+        if not frames:
+            return None
+        index = int(time * self.rate)
+        if self.loop:
+            return frames[index % len(frames)]
+        return frames[min(index, len(frames) - 1)]
+
+
 class AnimationSet:
-    def __init__(self, data):
-        self.data = data
-        self.state = next(iter(data))
+    __slots__ = ("clips", "clip", "state", "time")
+
+    def __init__(self, clips):
+        self.clips = clips
+        self.state = next(iter(clips))
+        self.clip = clips[self.state]
         self.time = 0.0
 
     def play(self, state, restart=False):
-        if state not in self.data:
+        clip = self.clips.get(state)
+        if clip is None:
             return
         if state != self.state or restart:
             self.state = state
+            self.clip = clip
             self.time = 0.0
 
     def update(self, dt):
         self.time += dt
 
     def frame(self, direction):
-        info = self.data[self.state]
-        frames = info["frames"][direction]
-        if not frames:
-            return None
-
-        duration = info.get("duration")
-        fps = info.get("fps", 0)
-        loop = info.get("loop", True)
-
-        if duration:
-            progress = min(1.0, self.time / duration)
-            index = min(len(frames) - 1, int(progress * len(frames)))
-            return frames[index]
-
-        if fps <= 0:
-            return frames[0]
-
-        index = int(self.time * fps)
-        if loop:
-            index %= len(frames)
-        else:
-            index = min(len(frames) - 1, index)
-        return frames[index]
+        return self.clip.frame(direction, self.time)
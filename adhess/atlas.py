@@ -0,0 +1,142 @@
+import json
+import struct
+from pathlib import Path
+
+import pygame
+
+from adhess.utils import source_stamp, write_file_atomic
+
+ATLAS_VERSION = 1
+ATLAS_MAX_WIDTH = 2048
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def atlas_name(root, prefix, scale):
+    root = Path(root)
+    return f"{root.parent.name}_{root.name}_{prefix}@{scale:g}"
+
+
+def frame_paths(root, prefix, frame_count):
+    return [Path(root) / f"{prefix}{index:03d}.png" for index in range(frame_count)]
+
+
+def source_stamps(paths):
+    return [[path.name, *source_stamp(path)] for path in paths]
+
+
+def scaled_frame_size(path, scale=1.0):
+    # The size sits in the PNG header, so nothing has to be decoded
+    with open(path, "rb") as file:
+        header = file.read(24)
+    if len(header) < 24 or not header.startswith(PNG_SIGNATURE):
+        raise ValueError(f"not a PNG file: {path}")
+    width, height = struct.unpack(">II", header[16:24])
+    if scale != 1.0:
+        width = max(1, int(width * scale))
+        height = max(1, int(height * scale))
+    return width, height
+
+
+def load_scaled_frame(path, scale=1.0):
+    surface = pygame.image.load(str(path))
+    if scale != 1.0:
+        width = max(1, int(surface.get_width() * scale))
+        height = max(1, int(surface.get_height() * scale))
+        surface = pygame.transform.smoothscale(surface, (width, height))
+    return surface
+
+
+def pack_frames(frames, max_width=ATLAS_MAX_WIDTH):
+    rects = []
+    x = y = row_height = sheet_width = 0
+    for frame in frames:
+        width, height = frame.get_size()
+        if x > 0 and x + width > max_width:
+            x = 0
+            y += row_height
+            row_height = 0
+        rects.append(pygame.Rect(x, y, width, height))
+        x += width
+        row_height = max(row_height, height)
+        sheet_width = max(sheet_width, x)
+
+    sheet = pygame.Surface((max(1, sheet_width), max(1, y + row_height)), pygame.SRCALPHA)
+    sheet.fill((0, 0, 0, 0))
+    for frame, rect in zip(frames, rects):
+        sheet.blit(frame, rect)
+    return sheet, rects
+
+
+def _read_index(index_path):
+    try:
+        with open(index_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _index_matches(index, scale, stamps):
+    if not index or index.get("version") != ATLAS_VERSION:
+        return False
+    if index.get("scale") != scale:
+        return False
+    return index.get("sources") == stamps and len(index.get("frames", [])) == len(stamps)
+
+
+def _read_pixels(sheet_path, size):
+    with open(sheet_path, "rb") as file:
+        pixels = file.read()
+    if len(pixels) != size[0] * size[1] * 4:
+        return None
+    return pixels
+
+
+def _write_atlas(pixels, index, sheet_path, index_path):
+    try:
+        sheet_path.parent.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return
+    # The index goes last so it never describes a sheet that was not written
+    if write_file_atomic(sheet_path, lambda file: file.write(pixels)):
+        write_file_atomic(index_path, lambda file: json.dump(index, file), "w")
+
+
+def load_atlas(root, prefix, frame_count, scale, cache_dir=None):
+    paths = frame_paths(root, prefix, frame_count)
+    if cache_dir is None:
+        frames = [load_scaled_frame(path, scale) for path in paths]
+        sheet, rects = pack_frames(frames)
+        return pygame.image.tobytes(sheet, "RGBA"), sheet.get_size(), rects
+
+    stamps = source_stamps(paths)
+    name = atlas_name(root, prefix, scale)
+    sheet_path = Path(cache_dir) / f"{name}.rgba"
+    index_path = Path(cache_dir) / f"{name}.json"
+
+    index = _read_index(index_path)
+    if _index_matches(index, scale, stamps):
+        size = tuple(index["size"])
+        try:
+            pixels = _read_pixels(sheet_path, size)
+        except (OSError, ValueError):
+            pixels = None
+        if pixels is not None:
+            return pixels, size, [pygame.Rect(rect) for rect in index["frames"]]
+
+    frames = [load_scaled_frame(path, scale) for path in paths]
+    sheet, rects = pack_frames(frames)
+    pixels = pygame.image.tobytes(sheet, "RGBA")
+    index = {
+        "version": ATLAS_VERSION,
+        "scale": scale,
+        "size": list(sheet.get_size()),
+        "sources": stamps,
+        "frames": [list(rect) for rect in rects],
+    }
+    _write_atlas(pixels, index, sheet_path, index_path)
+    return pixels, sheet.get_size(), rects
+
+
+def slice_sheet(pixels, size, rects):
+    sheet = pygame.image.frombuffer(pixels, size, "RGBA").convert_alpha()
+    return [sheet.subsurface(rect) for rect in rects]
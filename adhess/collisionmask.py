@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pygame
+
+
+def load_mask_pixels(path):
+    surface = pygame.image.load(os.fspath(path))
+    width, height = surface.get_size()
+    pixels = np.frombuffer(pygame.image.tobytes(surface, "RGBA"), dtype=np.uint8)
+    return pixels.reshape(height, width, 4)
+
+
+def mask_from_alpha(pixels, threshold=128):
+    return pixels[:, :, 3] >= threshold
+
+
+def mask_from_color(pixels, color, tolerance=0):
+    difference = np.abs(pixels[:, :, :3].astype(np.int16) - np.array(color[:3], dtype=np.int16))
+    return difference.max(axis=2) <= tolerance
+
+
+def coarsen_mask(mask, cell_size):
+    if cell_size <= 1:
+        return mask
+    height, width = mask.shape
+    rows = -(-height // cell_size)
+    columns = -(-width // cell_size)
+    padded = np.zeros((rows * cell_size, columns * cell_size), dtype=bool)
+    padded[:height, :width] = mask
+    # A cell is solid as soon as one of its pixels is
+    return padded.reshape(rows, cell_size, columns, cell_size).any(axis=(1, 3))
+
+
+def _row_runs(row):
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], row, [False])).astype(np.int8)))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def _merge_rows(mask):
+    rects = []
+    open_spans = {}
+    for y, row in enumerate(mask):
+        spans = _row_runs(row)
+        current = set(spans)
+        for span in [span for span in open_spans if span not in current]:
+            top = open_spans.pop(span)
+            rects.append((span[0], top, span[1] - span[0], y - top))
+        for span in spans:
+            open_spans.setdefault(span, y)
+    for span, top in open_spans.items():
+        rects.append((span[0], top, span[1] - span[0], len(mask) - top))
+    return rects
+
+
+def merge_mask_rects(mask, cell_size=1):
+    rects = _merge_rows(mask)
+    # Tall thin walls merge better column by column, keep whichever scan gives fewer rects
+    columns = [(x, y, width, height) for y, x, height, width in _merge_rows(mask.T)]
+    if len(columns) < len(rects):
+        rects = columns
+    rects.sort(key=lambda rect: (rect[1], rect[0]))
+    return [pygame.Rect(x * cell_size, y * cell_size, width * cell_size, height * cell_size) for x, y, width, height in rects]
+
+
+def build_collision_data(typed_rects, bounds_padding=0):
+    return {
+        "bounds_padding": bounds_padding,
+        "rects": [{"type": rect_type, "rect": list(rect)} for rect_type, rect in typed_rects],
+    }
+
+
+def write_collision_data(path, data):
+    lines = ["{", f'  "bounds_padding": {json.dumps(data["bounds_padding"])},', '  "rects": [']
+    entries = [f"    {json.dumps(entry, separators=(', ', ': '))}" for entry in data["rects"]]
+    lines.append(",\n".join(entries))
+    lines.extend(["  ]", "}"])
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(line for line in lines if line) + "\n")
+
+
+def _parse_layer(value):
+    rect_type, _, color = value.partition("=")
+    color = color.lstrip("#")
+    if len(color) != 6:
+        raise argparse.ArgumentTypeError(f"couleur invalide : {value}")
+    return rect_type.lower(), tuple(int(color[index:index + 2], 16) for index in (0, 2, 4))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère les rectangles de collision d'une carte depuis un masque.")
+    parser.add_argument("mask", help="image du masque (alpha ou couleurs)")
+    parser.add_argument("-o", "--output", help="fichier JSON de sortie")
+    parser.add_argument("--layer", action="append", type=_parse_layer, default=[], metavar="TYPE=RRGGBB",
+                        help="type de collision associé à une couleur du masque")
+    parser.add_argument("--alpha", metavar="TYPE", help="utilise l'alpha du masque pour ce type")
+    parser.add_argument("--threshold", type=int, default=128, help="seuil d'alpha (défaut 128)")
+    parser.add_argument("--tolerance", type=int, default=0, help="tolérance par canal pour les couleurs")
+    parser.add_argument("--cell", type=int, default=1, help="taille de grille en pixels (défaut 1)")
+    parser.add_argument("--padding", type=int, default=0, help="bounds_padding écrit dans le JSON")
+    args = parser.parse_args(argv)
+
+    layers = [(rect_type, color) for rect_type, color in args.layer]
+    if args.alpha:
+        layers.append((args.alpha.lower(), None))
+    if not layers:
+        parser.error("indiquez au moins un --layer ou --alpha")
+
+    pixels = load_mask_pixels(args.mask)
+    area = pygame.Rect(0, 0, pixels.shape[1], pixels.shape[0])
+    typed_rects = []
+    for rect_type, color in layers:
+        if color is None:
+            mask = mask_from_alpha(pixels, args.threshold)
+        else:
+            mask = mask_from_color(pixels, color, args.tolerance)
+        rects = [rect.clip(area) for rect in merge_mask_rects(coarsen_mask(mask, args.cell), args.cell)]
+        typed_rects.extend((rect_type, rect) for rect in rects)
+        print(f"{rect_type}: {len(rects)} rectangles")
+
+    output = args.output or Path(args.mask).with_name(Path(args.mask).stem + "_collisions.json")
+    write_collision_data(output, build_collision_data(typed_rects, args.padding))
+    print(f"Collisions écrites dans {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from adhess.map import COLLISION_CELL_SIZE, RectGrid, index_collision_entries, parse_collision_entries, read_collision_data
+from adhess.utils import source_stamp, write_file_atomic
+
+PACK_MAGIC = b"ADHC"
+PACK_VERSION = 2
+PACK_SUFFIX = ".bin"
+
+# magic, version, type count, bounds padding, has margin, margin, source mtime, source size, rect count, cell size
+_HEADER = struct.Struct("<4sHHiIdqqII")
+# type name, first rect, rect count, first cell, cell count
+_TYPE_ENTRY = struct.Struct("<16sIIII")
+
+
+def pack_path(collision_path):
+    path = Path(collision_path)
+    return path.with_suffix(PACK_SUFFIX)
+
+
+def _aligned(size):
+    return (size + 7) & ~7
+
+
+def compile_collision_data(data, stamp=(0, 0), cell_size=COLLISION_CELL_SIZE):
+    entries = parse_collision_entries(data.get("rects", []))
+    margin = data.get("collision_margin")
+    by_type = index_collision_entries(entries)
+
+    rects = []
+    indices = []
+    cells = []
+    members = []
+    table = []
+    for rect_type, items in by_type.items():
+        grid = RectGrid.from_rects(items, cell_size)
+        rows = grid.cell_rows()
+        rows[:, 2] += len(members)
+        table.append((rect_type, len(rects), len(items), len(cells), len(rows)))
+        for index, rect in items:
+            rects.append(tuple(rect))
+            indices.append(index)
+        cells.extend(rows.tolist())
+        members.extend(grid.members.tolist())
+
+    header = _HEADER.pack(
+        PACK_MAGIC,
+        PACK_VERSION,
+        len(table),
+        max(0, int(data.get("bounds_padding", 0))),
+        margin is not None,
+        float(margin) if margin is not None else 0.0,
+        stamp[0],
+        stamp[1],
+        len(rects),
+        cell_size,
+    )
+    types = b"".join(_TYPE_ENTRY.pack(name.encode("ascii"), *counts) for name, *counts in table)
+    prefix = header + types
+    arrays = (
+        np.array(rects, dtype="<i4").reshape(-1, 4),
+        np.array(indices, dtype="<i4"),
+        np.array(cells, dtype="<i4").reshape(-1, 4),
+        np.array(members, dtype="<i4"),
+    )
+    return prefix + bytes(_aligned(len(prefix)) - len(prefix)) + b"".join(array.tobytes() for array in arrays)
+
+
+class CollisionPack:
+    def __init__(self, buffer, source=None):
+        # Keeps the mmap alive while the arrays below point into it
+        self.source = source
+        magic, version, type_count, padding, has_margin, margin, mtime, size, rect_count, cell_size = _HEADER.unpack_from(buffer)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError("unsupported collision pack")
+        self.bounds_padding = padding
+        self.collision_margin = margin if has_margin else None
+        self.stamp = (mtime, size)
+        self.cell_size = cell_size
+
+        self.types = []
+        self.type_ranges = {}
+        cell_total = 0
+        for position in range(type_count):
+            name, first_rect, count, first_cell, cell_count = _TYPE_ENTRY.unpack_from(buffer, _HEADER.size + position * _TYPE_ENTRY.size)
+            name = name.rstrip(b"\0").decode("ascii")
+            self.types.append(name)
+            self.type_ranges[name] = (first_rect, count, first_cell, cell_count)
+            cell_total += cell_count
+
+        offset = _aligned(_HEADER.size + type_count * _TYPE_ENTRY.size)
+        self.rects = np.frombuffer(buffer, dtype="<i4", count=rect_count * 4, offset=offset).reshape(-1, 4)
+        offset += self.rects.nbytes
+        self.indices = np.frombuffer(buffer, dtype="<i4", count=rect_count, offset=offset)
+        offset += self.indices.nbytes
+        self.cells = np.frombuffer(buffer, dtype="<i4", count=cell_total * 4, offset=offset).reshape(-1, 4)
+        offset += self.cells.nbytes
+        member_total = int(self.cells[:, 3].sum()) if cell_total else 0
+        self.members = np.frombuffer(buffer, dtype="<i4", count=member_total, offset=offset)
+
+    def entries(self):
+        rects = self.rects.tolist()
+        indices = self.indices.tolist()
+        entries = [None] * len(rects)
+        for name, (first_rect, count, _, _) in self.type_ranges.items():
+            for position in range(first_rect, first_rect + count):
+                entries[indices[position]] = (rects[position], name)
+        return entries
+
+    def entry_bounds(self):
+        bounds = np.empty((len(self.rects), 4), dtype=float)
+        bounds[self.indices, :2] = self.rects[:, :2]
+        bounds[self.indices, 2:] = self.rects[:, :2] + self.rects[:, 2:]
+        return bounds
+
+    def grid(self, rect_type):
+        # Queries read the mapped member array in place
+        _, _, first_cell, cell_count = self.type_ranges[rect_type]
+        return RectGrid.from_cells(self.cells[first_cell:first_cell + cell_count], self.members, self.cell_size)
+
+
+def open_collision_pack(path):
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return CollisionPack(mapped, mapped)
+
+
+def write_collision_pack(path, payload):
+    write_file_atomic(path, lambda file: file.write(payload))
+
+
+def load_collision_pack(collision_path):
+    if not os.path.exists(collision_path):
+        # A map without a collision file simply has no walls
+        return CollisionPack(compile_collision_data({}))
+    stamp = source_stamp(collision_path)
+    compiled_path = pack_path(collision_path)
+    try:
+        # Check the stamp before mapping so a stale pack can be replaced right away
+        with open(compiled_path, "rb") as file:
+            header = _HEADER.unpack(file.read(_HEADER.size))
+        if header[:2] == (PACK_MAGIC, PACK_VERSION) and header[6:8] == stamp:
+            return open_collision_pack(compiled_path)
+    except (OSError, ValueError, struct.error):
+        pass
+    payload = compile_collision_data(read_collision_data(collision_path), stamp)
+    write_collision_pack(compiled_path, payload)
+    return CollisionPack(payload)
+
+
+def main(argv=None):
+    paths = sys.argv[1:] if argv is None else argv
+    if not paths:
+        print("usage : python -m adhess.collisionpack CARTE_collisions.json [...]")
+        return
+    for collision_path in paths:
+        payload = compile_collision_data(read_collision_data(collision_path), source_stamp(collision_path))
+        write_collision_pack(pack_path(collision_path), payload)
+        print(f"{collision_path} -> {pack_path(collision_path)}")
+
+
+if __name__ == "__main__":
+    main()
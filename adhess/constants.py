@@ -5,6 +5,8 @@ SCREEN_HEIGHT = 720
 SCREEN_SIZE = (SCREEN_WIDTH, SCREEN_HEIGHT)
 SCREEN_CENTER = pygame.Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
 BACKGROUND_COLOR = (22, 22, 28)
+FRAME_CACHE_BUDGET = 32 * 1024 * 1024
+TEXT_CACHE_SIZE = 256
 
 PLAYER_ATTACK_DURATION = 0.28
 PLAYER_ATTACK_COOLDOWN = 0.22
@@ -18,9 +20,18 @@ PLAYER_MOVE_SPEED = 220
 PLAYER_DASH_SPEED = 620
 PLAYER_DAMAGE_FLASH_DURATION = 0.3
 
+DASH_TRAIL_CAPACITY = 32
+PARTICLE_CAPACITY = 512
+EFFECT_ALPHA_STEP = 8
+
 ENEMY_WALK_FPS = 8
 ENEMY_ATTACK_DURATION = 0.35
 ENEMY_HURT_DURATION = 0.25
 ENEMY_ATTACK_COOLDOWN = 0.8
 ENEMY_ATTACK_DAMAGE = 3 #10
 ENEMY_MOVE_SPEED = 90
+ENEMY_SEPARATION_STRENGTH = 0.5
+ENEMY_GRID_CELL_SIZE = 64
+ENEMY_FLOW_CELL_SIZE = 32
+# Enemies further than this outside the screen are skipped before their frame is looked up
+ENEMY_DRAW_MARGIN = 96
@@ -3,8 +3,6 @@ from pathlib import Path
 
 import pygame
 
-from adhess.entities.enemy import Enemy
-
 
 DEFAULT_PATH = Path("savegame.json")
 
@@ -174,15 +172,13 @@ def set_player(player, data):
 
 
 def set_enemies(game, enemies_data):
-    enemies = []
+    game.enemies.clear()
     for entry in enemies_data or []:
         position = vector_from_list(entry.get("position"))
         kind = entry.get("type") or "goblin1"
         default_radius = game.get_enemy_radius(kind) if hasattr(game, "get_enemy_radius") else getattr(game, "enemy_radius", 10.0)
         radius = float(entry.get("radius", default_radius))
-        animations = game.clone_enemy_animation(kind) if hasattr(game, "clone_enemy_animation") else game.clone_enemy_animation()
-        enemy = Enemy(position, animations, radius)
-        enemy.kind = kind
+        enemy = game.spawn_enemy(kind, position, radius)
         enemy.direction = vector_from_list(entry.get("direction"), enemy.direction)
 
         for attr in ("speed", "max_health", "health", "attack_damage"):
@@ -199,9 +195,6 @@ def set_enemies(game, enemies_data):
         if duration is not None:
             enemy.attack_duration = float(duration)
 
-        enemies.append(enemy)
-    game.enemies = enemies
-
 
 def set_bindings(game, data):
     if not data:
@@ -0,0 +1,93 @@
+import numpy as np
+
+from adhess.utils import write_file_atomic
+
+FIELD_VERSION = 2
+FIELD_CELL_SIZE = 8
+# Distances are exact up to this far from a wall and capped beyond it, callers only ask about nearby walls
+FIELD_BAND = 128
+# Farthest a point inside the grid can sit from its nearest sample
+_NEAREST_REACH = 0.5 ** 0.5
+
+
+def bake_distance_field(bounds, area, cell_size=FIELD_CELL_SIZE, band=FIELD_BAND):
+    left, top, width, height = area
+    columns = int(np.ceil(width / cell_size)) + 1
+    rows = int(np.ceil(height / cell_size)) + 1
+    xs = left + np.arange(columns) * float(cell_size)
+    ys = top + np.arange(rows) * float(cell_size)
+
+    distance = np.full((rows, columns), float(band))
+    for rect_left, rect_top, rect_right, rect_bottom in bounds:
+        # Only the cells within the band around a rect can drop below the cap
+        first_column = max(0, int(np.floor((rect_left - band - left) / cell_size)))
+        last_column = min(columns, int(np.ceil((rect_right + band - left) / cell_size)) + 1)
+        first_row = max(0, int(np.floor((rect_top - band - top) / cell_size)))
+        last_row = min(rows, int(np.ceil((rect_bottom + band - top) / cell_size)) + 1)
+        if first_column >= last_column or first_row >= last_row:
+            continue
+        x = xs[None, first_column:last_column]
+        y = ys[first_row:last_row, None]
+        gap_x = np.maximum(np.maximum(rect_left - x, x - rect_right), 0.0)
+        gap_y = np.maximum(np.maximum(rect_top - y, y - rect_bottom), 0.0)
+        outside = np.hypot(gap_x, gap_y)
+        depth = np.minimum(np.minimum(x - rect_left, rect_right - x), np.minimum(y - rect_top, rect_bottom - y))
+        window = distance[first_row:last_row, first_column:last_column]
+        np.minimum(window, np.where(outside > 0, outside, -depth), out=window)
+    return DistanceField(distance.astype(np.float32), (left, top), cell_size)
+
+
+def load_distance_field(path, bounds, area, cell_size=FIELD_CELL_SIZE, band=FIELD_BAND):
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            header = data["header"]
+            if header.tolist() != [FIELD_VERSION, cell_size, band, *area]:
+                return None
+            if not np.array_equal(data["bounds"], bounds):
+                return None
+            return DistanceField(data["distance"], tuple(area[:2]), cell_size)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_distance_field(path, field, bounds, area, band=FIELD_BAND):
+    header = np.array([FIELD_VERSION, field.cell_size, band, *area], dtype=np.float64)
+    write_file_atomic(path, lambda file: np.savez(file, header=header, bounds=bounds, distance=field.distance))
+
+
+class DistanceField:
+    def __init__(self, distance, origin, cell_size):
+        self.distance = distance
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.cell_size = float(cell_size)
+        self.rows, self.columns = distance.shape
+        self.reach = _NEAREST_REACH * self.cell_size + 0.01
+
+    def clearance(self, x, y):
+        column = (x - self.origin[0]) / self.cell_size
+        row = (y - self.origin[1]) / self.cell_size
+        if not (0 <= column <= self.columns - 1 and 0 <= row <= self.rows - 1):
+            return -np.inf
+        # Distance to the walls is 1-Lipschitz, so the nearest sample bounds it from below
+        return float(self.distance[int(row + 0.5), int(column + 0.5)]) - self.reach
+
+    def clearances(self, points):
+        column = (points[:, 0] - self.origin[0]) / self.cell_size
+        row = (points[:, 1] - self.origin[1]) / self.cell_size
+        inside = (column >= 0) & (column <= self.columns - 1) & (row >= 0) & (row <= self.rows - 1)
+        result = np.full(len(points), -np.inf)
+        nearest = self.distance[(row[inside] + 0.5).astype(np.intp), (column[inside] + 0.5).astype(np.intp)]
+        result[inside] = nearest - self.reach
+        return result
+
+    def distances(self, points):
+        column = np.clip((points[:, 0] - self.origin[0]) / self.cell_size, 0.0, self.columns - 1.0)
+        row = np.clip((points[:, 1] - self.origin[1]) / self.cell_size, 0.0, self.rows - 1.0)
+        column0 = np.minimum(column.astype(np.intp), self.columns - 2)
+        row0 = np.minimum(row.astype(np.intp), self.rows - 2)
+        fx = column - column0
+        fy = row - row0
+        grid = self.distance
+        top = grid[row0, column0] * (1 - fx) + grid[row0, column0 + 1] * fx
+        bottom = grid[row0 + 1, column0] * (1 - fx) + grid[row0 + 1, column0 + 1] * fx
+        return top * (1 - fy) + bottom * fy
@@ -0,0 +1,148 @@
+import math
+
+import numpy as np
+import pygame
+
+from adhess.constants import EFFECT_ALPHA_STEP
+
+
+class EffectSprites:
+    def __init__(self, alpha_step=EFFECT_ALPHA_STEP):
+        self.alpha_step = alpha_step
+        self.sprites = {}
+
+    def circle(self, color, radius, alpha):
+        # Alpha is snapped to a few levels so a fading effect reuses a handful of sprites
+        alpha = min(255, int(round(alpha / self.alpha_step)) * self.alpha_step)
+        key = (color, radius, alpha)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (*color, alpha), (radius, radius), radius)
+            self.sprites[key] = sprite
+        return sprite
+
+
+class HealthBarAtlas:
+    def __init__(self, height, back_color, fill_color):
+        self.height = height
+        self.back_color = back_color
+        self.fill_color = fill_color
+        self.strips = {}
+
+    def bar(self, width, ratio):
+        strip = self.strips.get(width)
+        if strip is None:
+            # One row per filled pixel count, a bar is a blit of the matching row
+            strip = pygame.Surface((width, self.height * (width + 1))).convert()
+            strip.fill(self.back_color)
+            for filled in range(1, width + 1):
+                strip.fill(self.fill_color, (0, filled * self.height, filled, self.height))
+            self.strips[width] = strip
+        filled = min(width, max(0, int(width * ratio)))
+        return strip, pygame.Rect(0, filled * self.height, width, self.height)
+
+
+class ParticleEmitter:
+    def __init__(self, capacity, alpha=255, min_size=1, min_alpha=0, drag=0.0):
+        self.capacity = capacity
+        self.alpha = alpha
+        self.min_size = min_size
+        self.min_alpha = min_alpha
+        self.drag = drag
+        self.position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.life = np.zeros(capacity)
+        self.lifetime = np.ones(capacity)
+        self.size = np.zeros(capacity)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.count = 0
+        self.rng = np.random.default_rng()
+
+    def __len__(self):
+        return self.count
+
+    def _slots(self, amount):
+        live = self.count
+        free = min(amount, self.capacity - live)
+        slots = np.arange(live, live + free)
+        if free < amount:
+            # A full emitter recycles its oldest live particles instead of growing
+            oldest = np.argsort(self.life[:live] / self.lifetime[:live], kind="stable")[: amount - free]
+            slots = np.concatenate((slots, oldest))
+        self.count = live + free
+        return slots
+
+    def emit(self, position, amount=1, speed=0.0, life=0.5, size=4, color=(255, 255, 255), direction=0.0, spread=math.tau):
+        slots = self._slots(amount)
+        amount = len(slots)
+        rng = self.rng
+        angles = direction + (rng.random(amount) - 0.5) * spread
+        speeds = speed * (0.5 + rng.random(amount) * 0.5) if speed else np.zeros(amount)
+        self.position[slots] = (position[0], position[1])
+        self.velocity[slots, 0] = np.cos(angles) * speeds
+        self.velocity[slots, 1] = np.sin(angles) * speeds
+        self.life[slots] = life
+        self.lifetime[slots] = life
+        self.size[slots] = size
+        self.color[slots] = color
+
+    def update(self, dt):
+        count = self.count
+        if count == 0:
+            return
+        life = self.life[:count]
+        life -= dt
+        velocity = self.velocity[:count]
+        self.position[:count] += velocity * dt
+        if self.drag:
+            velocity *= max(0.0, 1.0 - self.drag * dt)
+        alive = life > 0
+        if alive.all():
+            return
+        # Keep the survivors in spawn order so overlapping particles stack the same way
+        kept = int(np.count_nonzero(alive))
+        for column in (self.position, self.velocity, self.life, self.lifetime, self.size, self.color):
+            column[:kept] = column[:count][alive]
+        self.count = kept
+
+    def blits(self, offset, sprites):
+        count = self.count
+        if count == 0:
+            return []
+        ratio = self.life[:count] / self.lifetime[:count]
+        sizes = np.maximum(self.min_size, (self.size[:count] * ratio).astype(int)).tolist()
+        alphas = np.maximum(self.min_alpha, (self.alpha * ratio).astype(int)).tolist()
+        xs = (self.position[:count, 0] + offset[0]).tolist()
+        ys = (self.position[:count, 1] + offset[1]).tolist()
+        circle = sprites.circle
+        return [
+            (circle(color, size, alpha), (int(x - size), int(y - size)))
+            for x, y, size, alpha, color in zip(xs, ys, sizes, alphas, map(tuple, self.color[:count].tolist()))
+        ]
+
+    def clear(self):
+        self.count = 0
+
+
+class ParticleSystem:
+    def __init__(self):
+        self.emitters = {}
+
+    def add_emitter(self, name, emitter):
+        self.emitters[name] = emitter
+        return emitter
+
+    def __getitem__(self, name):
+        return self.emitters[name]
+
+    def __len__(self):
+        return sum(emitter.count for emitter in self.emitters.values())
+
+    def update(self, dt):
+        for emitter in self.emitters.values():
+            emitter.update(dt)
+
+    def clear(self):
+        for emitter in self.emitters.values():
+            emitter.clear()
@@ -1,3 +1,6 @@
+from itertools import islice
+
+import numpy as np
 import pygame
 
 from adhess.constants import (
@@ -5,70 +8,92 @@ from adhess.constants import (
     ENEMY_ATTACK_DAMAGE,
     ENEMY_ATTACK_DURATION,
     ENEMY_HURT_DURATION,
+    ENEMY_GRID_CELL_SIZE,
     ENEMY_MOVE_SPEED,
+    ENEMY_SEPARATION_STRENGTH,
 )
+from adhess.entities.spatial import SpatialHash
 from adhess.utils import vector_to_direction_index
 
+ANIMATION_STATES = ("walk", "attack", "hurt")
+WALK, ATTACK, HURT = range(len(ANIMATION_STATES))
+
+SCALAR_COLUMNS = (
+    "radius",
+    "speed",
+    "max_health",
+    "health",
+    "attack_damage",
+    "attack_cooldown_time",
+    "attack_timer",
+    "attack_duration",
+    "attack_anim_timer",
+    "hurt_duration",
+    "hurt_timer",
+    "anim_time",
+)
+
+
+class _Column:
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, enemy, owner=None):
+        if enemy is None:
+            return self
+        return float(getattr(enemy.pool, self.name)[enemy.index])
+
+    def __set__(self, enemy, value):
+        getattr(enemy.pool, self.name)[enemy.index] = value
+
 
 class Enemy:
-    def __init__(self, position, animations, radius):
-        self.position = pygame.Vector2(position)
-        self.radius = radius
-        self.speed = ENEMY_MOVE_SPEED
-        self.max_health = 60
-        self.health = self.max_health
-
-        self.attack_damage = ENEMY_ATTACK_DAMAGE
-        self.attack_cooldown_time = ENEMY_ATTACK_COOLDOWN
-        self.attack_timer = 0.0
-
-        self.attack_duration = ENEMY_ATTACK_DURATION
-        self.attack_anim_timer = 0.0
-        self.hurt_duration = ENEMY_HURT_DURATION
-        self.hurt_timer = 0.0
-
-        self.direction = pygame.Vector2(0, 1)
-        self.animations = animations
-
-    def update(self, dt, target):
-        to_player = target - self.position
-        if to_player.length_squared() > 0:
-            self.direction = to_player.normalize()
-
-        can_move = self.hurt_timer <= 0 and self.attack_anim_timer <= 0
-        if can_move and to_player.length_squared() > 0:
-            self.position += self.direction * self.speed * dt
-
-        self.attack_timer = max(0.0, self.attack_timer - dt)
-        self.hurt_timer = max(0.0, self.hurt_timer - dt)
-        self.attack_anim_timer = max(0.0, self.attack_anim_timer - dt)
-
-        if self.animations.state == "hurt" and self.hurt_timer <= 0:
-            self.animations.play("walk", restart=True)
-        if self.animations.state == "attack" and self.attack_anim_timer <= 0:
-            self.animations.play("walk", restart=True)
-
-        if self.animations.state not in {"attack", "hurt"}:
-            self.animations.play("walk")
-
-        self.animations.update(dt)
-
-    def ready_to_attack(self, target_pos, target_radius):
-        if self.attack_timer > 0:
-            return False
-        total_range = self.radius + target_radius + 6
-        if (target_pos - self.position).length_squared() <= total_range * total_range:
-            self.attack_timer = self.attack_cooldown_time
-            self.attack_anim_timer = self.attack_duration
-            self.animations.play("attack", restart=True)
-            return True
-        return False
-
-    def take_damage(self, amount):
-        self.health -= amount
-        if self.health > 0:
-            self.hurt_timer = self.hurt_duration
-            self.animations.play("hurt", restart=True)
+    __slots__ = ("pool", "index")
+
+    radius = _Column("radius")
+    speed = _Column("speed")
+    max_health = _Column("max_health")
+    health = _Column("health")
+    attack_damage = _Column("attack_damage")
+    attack_cooldown_time = _Column("attack_cooldown_time")
+    attack_timer = _Column("attack_timer")
+    attack_duration = _Column("attack_duration")
+    attack_anim_timer = _Column("attack_anim_timer")
+    hurt_duration = _Column("hurt_duration")
+    hurt_timer = _Column("hurt_timer")
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+
+    @property
+    def position(self):
+        x, y = self.pool.position[self.index]
+        return pygame.Vector2(float(x), float(y))
+
+    @position.setter
+    def position(self, value):
+        self.pool.position[self.index] = (value[0], value[1])
+        self.pool.grid_valid = False
+
+    @property
+    def direction(self):
+        x, y = self.pool.direction[self.index]
+        return pygame.Vector2(float(x), float(y))
+
+    @direction.setter
+    def direction(self, value):
+        value = pygame.Vector2(value)
+        self.pool.direction[self.index] = (value.x, value.y)
+        self.pool.direction_index[self.index] = vector_to_direction_index(value)
+
+    @property
+    def kind(self):
+        return self.pool.kinds[self.index]
+
+    @kind.setter
+    def kind(self, value):
+        self.pool.kinds[self.index] = value
 
     @property
     def is_dead(self):
@@ -80,7 +105,250 @@ class Enemy:
 
     @property
     def direction_index(self):
-        return vector_to_direction_index(self.direction)
+        return int(self.pool.direction_index[self.index])
 
     def current_frame(self):
-        return self.animations.frame(self.direction_index)
+        return self.pool.frame(self.index)
+
+
+class EnemyPool:
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.capacity = 0
+        self.position = np.zeros((0, 2))
+        self.direction = np.zeros((0, 2))
+        for name in SCALAR_COLUMNS:
+            setattr(self, name, np.zeros(0))
+        self.direction_index = np.zeros(0, dtype=np.int8)
+        self.anim_state = np.zeros(0, dtype=np.int8)
+        # Slots move when enemies die, the id stays with the enemy for its whole life
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.next_id = 0
+        # Slot views, kinds and clips are allocated once per slot and recycled
+        self.kinds = []
+        self.clips = []
+        self.views = []
+        self._grow(capacity)
+        self.grid = SpatialHash(ENEMY_GRID_CELL_SIZE)
+        self.grid_valid = False
+
+    def _grow(self, capacity):
+        def _resized(array):
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[: self.count] = array[: self.count]
+            return grown
+
+        self.position = _resized(self.position)
+        self.direction = _resized(self.direction)
+        for name in SCALAR_COLUMNS:
+            setattr(self, name, _resized(getattr(self, name)))
+        self.direction_index = _resized(self.direction_index)
+        self.anim_state = _resized(self.anim_state)
+        self.ids = _resized(self.ids)
+        extra = capacity - self.capacity
+        self.kinds.extend([None] * extra)
+        self.clips.extend([None] * extra)
+        self.views.extend(Enemy(self, index) for index in range(self.capacity, capacity))
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __iter__(self):
+        return islice(self.views, self.count)
+
+    def __getitem__(self, index):
+        if not -self.count <= index < self.count:
+            raise IndexError(index)
+        return self.views[index % self.count]
+
+    def clear(self):
+        self.count = 0
+        self.grid_valid = False
+
+    def spawn(self, position, clips, radius, kind="goblin1"):
+        if self.count == self.capacity:
+            self._grow(max(16, self.capacity * 2))
+        i = self.count
+        self.position[i] = (position[0], position[1])
+        self.direction[i] = (0.0, 1.0)
+        self.radius[i] = radius
+        self.speed[i] = ENEMY_MOVE_SPEED
+        self.max_health[i] = 60
+        self.health[i] = 60
+        self.attack_damage[i] = ENEMY_ATTACK_DAMAGE
+        self.attack_cooldown_time[i] = ENEMY_ATTACK_COOLDOWN
+        self.attack_timer[i] = 0.0
+        self.attack_duration[i] = ENEMY_ATTACK_DURATION
+        self.attack_anim_timer[i] = 0.0
+        self.hurt_duration[i] = ENEMY_HURT_DURATION
+        self.hurt_timer[i] = 0.0
+        self.anim_state[i] = WALK
+        self.anim_time[i] = 0.0
+        self.direction_index[i] = 0
+        self.ids[i] = self.next_id
+        self.next_id += 1
+        self.kinds[i] = kind
+        self.clips[i] = clips
+        self.count += 1
+        self.grid_valid = False
+        return self.views[i]
+
+    def update(self, dt, target, flow_field=None):
+        n = self.count
+        if n == 0:
+            return
+        position = self.position[:n]
+        direction = self.direction[:n]
+        self.grid_valid = False
+
+        to_target = np.array((target[0], target[1])) - position
+        distance_sq = np.einsum("ij,ij->i", to_target, to_target)
+        has_target = distance_sq > 0
+        direction[has_target] = to_target[has_target] / np.sqrt(distance_sq[has_target])[:, None]
+        if flow_field is not None:
+            # Next to the player, or where the field has no way through, keep heading straight at it
+            steer = flow_field.directions_at(position)
+            follow = steer.any(axis=1) & (distance_sq > (1.5 * flow_field.cell_size) ** 2)
+            direction[follow] = steer[follow]
+
+        hurt_timer = self.hurt_timer[:n]
+        attack_anim_timer = self.attack_anim_timer[:n]
+        can_move = has_target & (hurt_timer <= 0) & (attack_anim_timer <= 0)
+        position[can_move] += direction[can_move] * (self.speed[:n][can_move] * dt)[:, None]
+
+        for timer in (self.attack_timer[:n], hurt_timer, attack_anim_timer):
+            np.subtract(timer, dt, out=timer)
+            np.maximum(timer, 0.0, out=timer)
+
+        anim_state = self.anim_state[:n]
+        finished = ((anim_state == HURT) & (hurt_timer <= 0)) | ((anim_state == ATTACK) & (attack_anim_timer <= 0))
+        anim_state[finished] = WALK
+        self.anim_time[:n][finished] = 0.0
+        self.anim_time[:n] += dt
+
+        x = direction[:, 0]
+        y = direction[:, 1]
+        horizontal = np.abs(x) > np.abs(y)
+        self.direction_index[:n] = np.where(horizontal, np.where(x > 0, 2, 1), np.where(y >= 0, 0, 3))
+
+    def resolve_collisions(self, game_map, collision_types=None):
+        position = self.position[: self.count]
+        before = position.copy() if self.grid_valid and self.count else None
+        game_map.resolve_collisions_batch(position, self.radius[: self.count], collision_types)
+        if before is not None:
+            # Wall pushes widen the grid queries like the separation pushes, no rebuild needed
+            moved = position - before
+            self.grid.slack += float(np.sqrt(np.einsum("ij,ij->i", moved, moved).max()))
+
+    def spatial_grid(self):
+        if not self.grid_valid:
+            self.grid.build(self.position[: self.count], self.radius[: self.count])
+            self.grid_valid = True
+        return self.grid
+
+    def overlapping(self, center, radius):
+        return self.spatial_grid().query_circle(center[0], center[1], radius, self.position, self.radius)
+
+    def visible(self, view, margin):
+        position = self.position[: self.count]
+        inside = (position[:, 0] >= view.left - margin) & (position[:, 0] < view.right + margin)
+        inside &= (position[:, 1] >= view.top - margin) & (position[:, 1] < view.bottom + margin)
+        return np.flatnonzero(inside)
+
+    def neighbours(self, point, radius):
+        return self.spatial_grid().query_radius(point[0], point[1], radius, self.position)
+
+    def separate(self, strength=ENEMY_SEPARATION_STRENGTH):
+        if self.grid.slack:
+            # Pairs come from the cells as built, slack only widens the circle queries
+            self.grid_valid = False
+        grid = self.spatial_grid()
+        first, second = grid.pairs()
+        if first.size == 0:
+            return
+        offset = self.position[second] - self.position[first]
+        distance_sq = np.einsum("ij,ij->i", offset, offset)
+        reach = self.radius[first] + self.radius[second]
+        overlapping = (distance_sq < reach * reach) & (distance_sq > 0)
+        if not overlapping.any():
+            return
+        first = first[overlapping]
+        second = second[overlapping]
+        offset = offset[overlapping]
+        distance = np.sqrt(distance_sq[overlapping])
+        push = offset * ((reach[overlapping] - distance) * (0.5 * strength) / distance)[:, None]
+
+        moved = np.zeros((self.count, 2))
+        np.subtract.at(moved, first, push)
+        np.add.at(moved, second, push)
+        self.position[: self.count] += moved
+        # The grid stays usable, queries are widened by the largest push
+        grid.slack += float(np.sqrt(np.einsum("ij,ij->i", moved, moved).max()))
+
+    def attack(self, target, target_radius):
+        if self.count == 0:
+            return 0.0
+        in_range = self.overlapping(target, target_radius + 6)
+        ready = in_range[self.attack_timer[in_range] <= 0]
+        if ready.size == 0:
+            return 0.0
+        # Only one enemy lands a hit per frame
+        i = ready.min()
+        self.attack_timer[i] = self.attack_cooldown_time[i]
+        self.attack_anim_timer[i] = self.attack_duration[i]
+        self.anim_state[i] = ATTACK
+        self.anim_time[i] = 0.0
+        return float(self.attack_damage[i])
+
+    def damage(self, indices, amount):
+        self.health[indices] -= amount
+        hurt = indices[self.health[indices] > 0]
+        self.hurt_timer[hurt] = self.hurt_duration[hurt]
+        self.anim_state[hurt] = HURT
+        self.anim_time[hurt] = 0.0
+
+    def damage_circle(self, center, radius, amount):
+        if self.count == 0:
+            return np.empty((0, 2))
+        hit = self.overlapping(center, radius)
+        if hit.size:
+            self.damage(hit, amount)
+        return self.position[hit]
+
+    def remove_dead(self):
+        dead = np.flatnonzero(self.health[: self.count] <= 0)
+        if dead.size:
+            self.grid_valid = False
+        positions = self.position[dead]
+        # Swap the last live slot into each hole, highest index first
+        for index in dead[::-1]:
+            last = self.count - 1
+            if index != last:
+                self._move_slot(last, index)
+            self.count = last
+        return positions
+
+    def _move_slot(self, source, target):
+        self.position[target] = self.position[source]
+        self.direction[target] = self.direction[source]
+        for name in SCALAR_COLUMNS:
+            column = getattr(self, name)
+            column[target] = column[source]
+        self.direction_index[target] = self.direction_index[source]
+        self.anim_state[target] = self.anim_state[source]
+        self.ids[target] = self.ids[source]
+        self.kinds[target] = self.kinds[source]
+        self.clips[target] = self.clips[source]
+
+    def replace_clips(self, clips, replacement):
+        for index in range(self.count):
+            if self.clips[index] is clips:
+                self.clips[index] = replacement
+
+    def frame(self, index):
+        clip = self.clips[index][ANIMATION_STATES[self.anim_state[index]]]
+        return clip.frame(self.direction_index[index], self.anim_time[index])
@@ -0,0 +1,94 @@
+import numpy as np
+
+_KEY_BIAS = 1 << 20
+_KEY_STRIDE = 1 << 21
+_EMPTY = np.zeros(0, dtype=np.intp)
+
+
+def _cell_keys(cell_x, cell_y):
+    return (cell_x + _KEY_BIAS) * _KEY_STRIDE + (cell_y + _KEY_BIAS)
+
+
+class SpatialHash:
+    def __init__(self, cell_size=64.0):
+        self.cell_size = float(cell_size)
+        self.cell = self.cell_size
+        self.count = 0
+        self.order = _EMPTY
+        self.sorted_keys = np.zeros(0, dtype=np.int64)
+        self.cells = np.zeros((0, 2), dtype=np.int64)
+        self.max_radius = 0.0
+        # How far any entity may have moved since the last build
+        self.slack = 0.0
+
+    def build(self, positions, radii):
+        self.count = len(positions)
+        self.max_radius = float(radii.max()) if self.count else 0.0
+        # Overlapping pairs must sit in neighbouring cells
+        self.cell = max(self.cell_size, 2 * self.max_radius)
+        self.cells = np.floor(positions / self.cell).astype(np.int64)
+        keys = _cell_keys(self.cells[:, 0], self.cells[:, 1])
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+        self.slack = 0.0
+
+    def candidates(self, x, y, reach):
+        if self.count == 0:
+            return _EMPTY
+        reach += self.slack
+        cell = self.cell
+        x0 = int(np.floor((x - reach) / cell))
+        x1 = int(np.floor((x + reach) / cell))
+        y0 = int(np.floor((y - reach) / cell))
+        y1 = int(np.floor((y + reach) / cell))
+        # Cells sharing a column are contiguous in key order, one slice per column
+        columns = np.arange(x0, x1 + 1)
+        starts = np.searchsorted(self.sorted_keys, _cell_keys(columns, y0), "left")
+        ends = np.searchsorted(self.sorted_keys, _cell_keys(columns, y1), "right")
+        slices = [self.order[start:end] for start, end in zip(starts, ends) if end > start]
+        if not slices:
+            return _EMPTY
+        return np.concatenate(slices) if len(slices) > 1 else slices[0]
+
+    def query_circle(self, x, y, radius, positions, radii):
+        candidates = self.candidates(x, y, radius + self.max_radius)
+        if candidates.size == 0:
+            return candidates
+        offset = positions[candidates] - (x, y)
+        reach = radii[candidates] + radius
+        return candidates[np.einsum("ij,ij->i", offset, offset) <= reach * reach]
+
+    def query_radius(self, x, y, radius, positions):
+        candidates = self.candidates(x, y, radius)
+        if candidates.size == 0:
+            return candidates
+        offset = positions[candidates] - (x, y)
+        return candidates[np.einsum("ij,ij->i", offset, offset) <= radius * radius]
+
+    def pairs(self):
+        if self.count < 2:
+            return _EMPTY, _EMPTY
+        cell_x = self.cells[:, 0]
+        cell_y = self.cells[:, 1]
+        firsts = []
+        seconds = []
+        # Half stencil: own column (deduplicated by index) and the column to the right
+        for dx in (0, 1):
+            starts = np.searchsorted(self.sorted_keys, _cell_keys(cell_x + dx, cell_y - 1), "left")
+            ends = np.searchsorted(self.sorted_keys, _cell_keys(cell_x + dx, cell_y + 1), "right")
+            counts = ends - starts
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            first = np.repeat(np.arange(self.count), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            second = self.order[np.repeat(starts, counts) + offsets]
+            if dx == 0:
+                keep = first < second
+                first = first[keep]
+                second = second[keep]
+            firsts.append(first)
+            seconds.append(second)
+        if not firsts:
+            return _EMPTY, _EMPTY
+        return np.concatenate(firsts), np.concatenate(seconds)
@@ -0,0 +1,122 @@
+import numpy as np
+
+from adhess.constants import ENEMY_FLOW_CELL_SIZE
+
+NEIGHBOURS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+UNREACHED = -1
+
+
+def _shifted(grid, dx, dy, fill):
+    # result[y, x] = grid[y - dy, x - dx]
+    rows, columns = grid.shape
+    result = np.full_like(grid, fill)
+    result[max(dy, 0):rows + min(dy, 0), max(dx, 0):columns + min(dx, 0)] = grid[
+        max(-dy, 0):rows + min(-dy, 0), max(-dx, 0):columns + min(-dx, 0)
+    ]
+    return result
+
+
+class FlowField:
+    def __init__(self, game_map, collision_types=None, clearance=0.0, cell_size=ENEMY_FLOW_CELL_SIZE):
+        self.cell_size = float(cell_size)
+        bounds = game_map.playable_bounds
+        self.origin = (float(bounds.left), float(bounds.top))
+        self.columns = max(1, int(np.ceil(bounds.width / self.cell_size)))
+        self.rows = max(1, int(np.ceil(bounds.height / self.cell_size)))
+
+        xs = self.origin[0] + (np.arange(self.columns) + 0.5) * self.cell_size
+        ys = self.origin[1] + (np.arange(self.rows) + 0.5) * self.cell_size
+        centers = np.stack(np.meshgrid(xs, ys), axis=-1)
+        self.centers = centers
+        distance = game_map.distance_field(collision_types).distances(centers.reshape(-1, 2))
+        self.walkable = (distance >= clearance).reshape(self.rows, self.columns)
+
+        # A diagonal step is only allowed when both orthogonal cells beside it are open
+        self.steps = []
+        for dx, dy in NEIGHBOURS:
+            allowed = self.walkable & _shifted(self.walkable, dx, dy, False)
+            if dx and dy:
+                allowed &= _shifted(self.walkable, dx, 0, False) & _shifted(self.walkable, 0, dy, False)
+            self.steps.append((dx, dy, allowed))
+
+        self.distance = np.full((self.rows, self.columns), UNREACHED, dtype=np.int32)
+        self.directions = np.zeros((self.rows, self.columns, 2))
+        self.target_cell = None
+
+    def cell_of(self, x, y):
+        column = int((x - self.origin[0]) // self.cell_size)
+        row = int((y - self.origin[1]) // self.cell_size)
+        return min(max(column, 0), self.columns - 1), min(max(row, 0), self.rows - 1)
+
+    def update(self, target):
+        cell = self.cell_of(target[0], target[1])
+        if cell == self.target_cell:
+            return False
+        self.target_cell = cell
+        self._spread(cell)
+        self._build_directions(cell)
+        return True
+
+    def _spread(self, cell):
+        distance = self.distance
+        distance.fill(UNREACHED)
+        column, row = cell
+        distance[row, column] = 0
+        unvisited = self.walkable.copy()
+        unvisited[row, column] = False
+        # Frontier with a one cell border, so each neighbour shift is a view instead of a copy
+        padded = np.zeros((self.rows + 2, self.columns + 2), dtype=bool)
+        inner = padded[1:-1, 1:-1]
+        inner[row, column] = True
+        reached = np.empty_like(unvisited)
+        scratch = np.empty_like(unvisited)
+        step = 0
+        # Breadth-first wavefront, one whole ring of cells per iteration
+        while True:
+            reached.fill(False)
+            for dx, dy, allowed in self.steps:
+                if step == 0 and not self.walkable[row, column]:
+                    # The player can stand in a blocked cell against a wall, leave it in any direction
+                    allowed = self.walkable
+                np.logical_and(padded[1 - dy:1 - dy + self.rows, 1 - dx:1 - dx + self.columns], allowed, out=scratch)
+                reached |= scratch
+            reached &= unvisited
+            if not reached.any():
+                break
+            step += 1
+            distance[reached] = step
+            unvisited &= ~reached
+            inner[...] = reached
+
+    def _build_directions(self, cell):
+        column, row = cell
+        to_target = self.centers[row, column] - self.centers
+        length = np.hypot(to_target[..., 0], to_target[..., 1])
+        length[length == 0] = 1.0
+        best_score = np.full((self.rows, self.columns), np.inf)
+        best = np.full((self.rows, self.columns), -1, dtype=np.int8)
+        # Cells too close to a wall are never reached, they just lead back to the nearest open cell
+        blocked = self.distance == UNREACHED
+        for index, (dx, dy, allowed) in enumerate(self.steps):
+            # Only strictly closer neighbours at +dx, +dy that can be stepped into from here
+            neighbour = _shifted(self.distance, -dx, -dy, UNREACHED)
+            usable = (neighbour != UNREACHED) & (blocked | (_shifted(allowed, -dx, -dy, False) & (neighbour < self.distance)))
+            # Ties between equally short steps go to the one closest to the straight line
+            alignment = (to_target[..., 0] * dx + to_target[..., 1] * dy) / (length * np.hypot(dx, dy))
+            score = np.where(usable, neighbour - 0.49 * alignment, np.inf)
+            better = score < best_score
+            best_score[better] = score[better]
+            best[better] = index
+
+        steps = np.array(NEIGHBOURS, dtype=float)
+        steps /= np.hypot(steps[:, 0], steps[:, 1])[:, None]
+        downhill = best >= 0
+        self.directions[:] = 0.0
+        self.directions[downhill] = steps[best[downhill]]
+
+    def directions_at(self, positions):
+        columns = ((positions[:, 0] - self.origin[0]) // self.cell_size).astype(np.intp)
+        rows = ((positions[:, 1] - self.origin[1]) // self.cell_size).astype(np.intp)
+        np.clip(columns, 0, self.columns - 1, out=columns)
+        np.clip(rows, 0, self.rows - 1, out=rows)
+        return self.directions[rows, columns]
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+
+
+def _surface_bytes(frames):
+    counted = set()
+    total = 0
+    for direction_frames in frames:
+        for frame in direction_frames:
+            owner = frame.get_parent() or frame
+            if id(owner) in counted:
+                continue
+            counted.add(id(owner))
+            total += owner.get_pitch() * owner.get_height()
+    return total
+
+
+class LazyFrames:
+    def __init__(self, cache, key, frames_per_direction):
+        self.cache = cache
+        self.key = key
+        self.frames_per_direction = frames_per_direction
+
+    def __getitem__(self, direction):
+        frames = self.cache.frames(self.key)
+        # A clip still decoding has no frames yet, the animation simply draws nothing for now
+        return frames[direction] if frames is not None else ()
+
+    def __len__(self):
+        return 4
+
+
+class FrameCache:
+    def __init__(self, loader, budget_bytes):
+        self.loader = loader
+        self.budget_bytes = budget_bytes
+        self.clips = OrderedDict()
+        self.pending = {}
+        self.failed = set()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def clip(self, root, prefix, frame_count, frames_per_direction, scale=1.0, direction_order=None):
+        order = tuple(direction_order) if direction_order is not None else None
+        key = (root, prefix, frame_count, frames_per_direction, scale, order)
+        return LazyFrames(self, key, frames_per_direction)
+
+    def frames(self, key):
+        entry = self.clips.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.clips.move_to_end(key)
+            return entry[0]
+
+        # Nothing here waits on a decode, a missing clip is requested and shows up on a later frame
+        job = self.pending.get(key)
+        if job is None:
+            if key not in self.failed:
+                self.misses += 1
+                self.pending[key] = self.loader.submit(*key)
+            return None
+        if not job.done():
+            return None
+        self.hits += 1
+        return self._finish(key)
+
+    def prefetch(self, frames):
+        key = frames.key
+        job = self.pending.get(key)
+        if job is None and key not in self.clips and key not in self.failed:
+            job = self.pending[key] = self.loader.submit(*key)
+        return job
+
+    def poll(self):
+        # At most one finished decode is taken in per frame, like the boot jobs
+        for key, job in self.pending.items():
+            if job.done():
+                self._finish(key)
+                return
+
+    def _finish(self, key):
+        job = self.pending.pop(key)
+        try:
+            frames = job.result()
+        except Exception:
+            self.failed.add(key)
+            return None
+        size = _surface_bytes(frames)
+        self.clips[key] = (frames, size)
+        self.used_bytes += size
+        self._evict()
+        return frames
+
+    def _evict(self):
+        while self.used_bytes > self.budget_bytes and len(self.clips) > 1:
+            key = next(iter(self.clips))
+            _, size = self.clips.pop(key)
+            self.used_bytes -= size
+
@@ -1,74 +1,102 @@
 import math
 import random
 import sys
+from functools import partial
 from pathlib import Path
 
+import numpy as np
 import pygame
 
-from adhess.animations import AnimationSet, build_idle_frames, load_directional_frames
+from adhess.animations import AnimationClip, AnimationSet, build_idle_frames
+from adhess.atlas import scaled_frame_size
+from adhess.collisionpack import load_collision_pack
 from adhess.data import save_game, load_game, has_save
 from adhess.constants import (
     BACKGROUND_COLOR,
+    DASH_TRAIL_CAPACITY,
     ENEMY_ATTACK_DURATION,
+    ENEMY_DRAW_MARGIN,
     ENEMY_HURT_DURATION,
     ENEMY_WALK_FPS,
+    FRAME_CACHE_BUDGET,
+    PARTICLE_CAPACITY,
     PLAYER_ATTACK_DURATION,
     PLAYER_DAMAGE_FLASH_DURATION,
     PLAYER_WALK_FPS,
     SCREEN_CENTER,
     SCREEN_SIZE,
+    TEXT_CACHE_SIZE,
 )
-from adhess.entities.enemy import Enemy
+from adhess.effects import EffectSprites, HealthBarAtlas, ParticleEmitter, ParticleSystem
+from adhess.entities.enemy import EnemyPool
 from adhess.entities.player import Player
+from adhess.flowfield import FlowField
+from adhess.framecache import FrameCache
+from adhess.loader import FrameLoader
 from adhess.map import GameMap
+from adhess.mapchunks import finish_map_chunks, read_map_chunks
+from adhess.renderqueue import LAYER_EFFECTS, LAYER_ENTITIES, LAYER_GROUND, RenderQueue
+from adhess.textcache import TextCache
+from adhess.ui import Box, Label, Menu, MenuCache
+from adhess.utils import hit_rate
 
 ASSETS_DIR = Path(__file__).resolve().parent.parent / "assets"
+ATLAS_CACHE_DIR = ASSETS_DIR / ".cache" / "atlas"
+CHUNK_CACHE_DIR = ASSETS_DIR / ".cache" / "chunks"
 
 PLAYER_COLLISION_TYPES = ("interior", "exterior")
 ENEMY_COLLISION_TYPES = ("interior",)
+BOOT_FIELD_TYPES = (ENEMY_COLLISION_TYPES, PLAYER_COLLISION_TYPES)
+DEBUG_COLLISION_STYLES = {
+    "interior": ((255, 60, 60, 60), (255, 80, 80, 180)),
+    "exterior": ((60, 120, 255, 60), (80, 160, 255, 180)),
+}
+DEBUG_DEFAULT_STYLE = ((255, 60, 60, 60), (255, 80, 80, 180))
+DEBUG_PANEL_INTERVAL_MS = 250
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, dirty_rendering=False):
         pygame.init()
         pygame.display.set_caption("adhess")
         self.screen = pygame.display.set_mode(SCREEN_SIZE)
         self.clock = pygame.time.Clock()
         self.running = True
-
-        self.map = GameMap(ASSETS_DIR / "maps" / "2.png", ASSETS_DIR / "maps" / "2_collisions.json")
-        screen_w, screen_h = SCREEN_SIZE
-        self.map_offset = pygame.Vector2(
-            max(0, (screen_w - self.map.rect.width) / 2),
-            max(0, (screen_h - self.map.rect.height) / 2),
-        )
-
+        self.dirty_rendering = dirty_rendering
+        self.frame_rects = []
+        self.previous_rects = []
+        self.last_camera = None
+        self.last_screen_key = None
+
+        self.frame_loader = FrameLoader(ATLAS_CACHE_DIR)
+        self.frame_cache = FrameCache(self.frame_loader, FRAME_CACHE_BUDGET)
+        self.text_cache = TextCache(TEXT_CACHE_SIZE)
+        self.ui_menus = MenuCache()
         swordman_root = ASSETS_DIR / "sprites" / "character" / "swordman"
-        swordman_scale = 1.8
-        swordman_walk_frames = load_directional_frames(swordman_root, "walk", 32, 8, swordman_scale)
-        swordman_attack_frames = load_directional_frames(swordman_root, "attack", 32, 8, swordman_scale)
-        swordman_idle_frames = build_idle_frames(swordman_walk_frames)
-        player_anim_data = {
-            "idle": {"frames": swordman_idle_frames, "fps": 0, "loop": False},
-            "walk": {"frames": swordman_walk_frames, "fps": PLAYER_WALK_FPS, "loop": True},
-        }
-        attack_fps = len(swordman_attack_frames[0]) / PLAYER_ATTACK_DURATION if PLAYER_ATTACK_DURATION > 0 else PLAYER_WALK_FPS
-        player_anim_data["attack"] = {
-            "frames": swordman_attack_frames,
-            "fps": attack_fps,
-            "loop": False,
-            "duration": PLAYER_ATTACK_DURATION,
+        self.swordman_scale = 1.8
+        map_path = ASSETS_DIR / "maps" / "2.png"
+        collision_path = ASSETS_DIR / "maps" / "2_collisions.json"
+        self.boot_jobs = {
+            "map_image": self.frame_loader.submit_call(
+                read_map_chunks,
+                map_path,
+                CHUNK_CACHE_DIR / map_path.stem,
+                finish=partial(finish_map_chunks, loader=self.frame_loader),
+            ),
+            "swordman_walk": self.frame_loader.submit(swordman_root, "walk", 32, 8, self.swordman_scale),
+            "swordman_attack": self.frame_loader.submit(swordman_root, "attack", 32, 8, self.swordman_scale),
         }
-        self.player = Player(self.map.rect.center, AnimationSet(player_anim_data))
-        self.player.radius = int(16 * swordman_scale)
-        self.player.position = self.random_spawn_point()
-        self.map.resolve_collisions(self.player.position, self.player.radius, PLAYER_COLLISION_TYPES)
-
-        # Enemy animations and sizes per type
-        self.enemy_anims = {}
-        self.enemy_sizes = {}
-
-        def _load_enemy_template(folder_name, scale=1.35, order=(0, 2, 3, 1)):
+        if collision_path.exists():
+            self.boot_jobs["map_collisions"] = self.frame_loader.submit_call(load_collision_pack, collision_path)
+        self.boot_results = {}
+        self.boot_paths = (map_path, collision_path)
+        self.assets_ready = False
+        self.map = None
+        self.flow_field = None
+        self.map_offset = pygame.Vector2()
+        self.player = None
+
+        def _enemy_frames(folder_name, scale=1.35, order=(0, 2, 3, 1)):
             root = ASSETS_DIR / "sprites" / "mobs" / folder_name
 
             def _count_frames(prefix: str) -> int:
@@ -80,50 +108,45 @@ class Game:
                     count += 1
                 return count
 
-            def _load(prefix: str):
+            def _clip(prefix: str):
                 total = _count_frames(prefix)
                 if total <= 0:
                     total = 24
                 fpd = max(1, total // 4)
-                return load_directional_frames(root, prefix, total, fpd, scale, list(order))
-
-            walk = _load("walk")
-            attack = _load("attack")
-            hurt = _load("hurt")
-            data = {
-                "walk": {"frames": walk, "fps": ENEMY_WALK_FPS, "loop": True},
-                "attack": {
-                    "frames": attack,
-                    "fps": len(attack[0]) / ENEMY_ATTACK_DURATION if ENEMY_ATTACK_DURATION > 0 else ENEMY_WALK_FPS,
-                    "loop": False,
-                    "duration": ENEMY_ATTACK_DURATION,
-                },
-                "hurt": {
-                    "frames": hurt,
-                    "fps": len(hurt[0]) / ENEMY_HURT_DURATION if ENEMY_HURT_DURATION > 0 else ENEMY_WALK_FPS,
-                    "loop": False,
-                    "duration": ENEMY_HURT_DURATION,
-                },
+                return self.frame_cache.clip(root, prefix, total, fpd, scale, order)
+
+            if _count_frames("walk") <= 0:
+                raise FileNotFoundError(root)
+            return {prefix: _clip(prefix) for prefix in ("walk", "attack", "hurt")}
+
+        def _enemy_radius(folder_name, scale=1.35):
+            width, _ = scaled_frame_size(ASSETS_DIR / "sprites" / "mobs" / folder_name / "walk000.png", scale)
+            return max(8, width // 3)
+
+        def _build_enemy_clips(frames):
+            return {
+                "walk": AnimationClip(frames["walk"], fps=ENEMY_WALK_FPS, loop=True),
+                "attack": AnimationClip(frames["attack"], fps=ENEMY_WALK_FPS, loop=False, duration=ENEMY_ATTACK_DURATION),
+                "hurt": AnimationClip(frames["hurt"], fps=ENEMY_WALK_FPS, loop=False, duration=ENEMY_HURT_DURATION),
             }
-            radius = 10
-            sample = walk[0] if walk else []
-            if sample:
-                radius = max(8, sample[0].get_width() // 3)
-            return AnimationSet(data), radius
 
-        anim, radius = _load_enemy_template("goblin")
-        self.enemy_anims["goblin1"] = anim
-        self.enemy_sizes["goblin1"] = radius
+        # Shared animation clips and sizes per enemy type, only goblin1 is decoded at boot
+        self.enemy_clips = {}
+        self.enemy_sizes = {}
+
+        self.enemy_clips["goblin1"] = _build_enemy_clips(_enemy_frames("goblin"))
+        self.enemy_sizes["goblin1"] = _enemy_radius("goblin")
+        for name, clip in self.enemy_clips["goblin1"].items():
+            self.boot_jobs[f"goblin1_{name}"] = self.frame_cache.prefetch(clip.frames)
 
         try:
-            anim2, radius2 = _load_enemy_template("goblin2", order=(1, 2, 3, 0))
-            self.enemy_anims["goblin2"] = anim2
-            self.enemy_sizes["goblin2"] = radius2
-        except Exception:
-            self.enemy_anims["goblin2"] = self.enemy_anims["goblin1"]
+            self.enemy_clips["goblin2"] = _build_enemy_clips(_enemy_frames("goblin2", order=(1, 2, 3, 0)))
+            self.enemy_sizes["goblin2"] = _enemy_radius("goblin2")
+        except (OSError, ValueError):
+            self.enemy_clips["goblin2"] = self.enemy_clips["goblin1"]
             self.enemy_sizes["goblin2"] = self.enemy_sizes["goblin1"]
 
-        self.enemies = []
+        self.enemies = EnemyPool()
         self.wave = 0
         self.wave_active = False
         self.wave_delay = 4.0
@@ -137,15 +160,27 @@ class Game:
         self.upgrade_description_font = pygame.font.Font(None, 24)
         self.debug_font = pygame.font.Font(None, 20)
         self.debug_show_collisions = False
+        self.debug_panel_surface = None
+        self.debug_panel_lines = None
+        self.debug_panel_time = 0
         self.camera = pygame.Vector2()
-        self.dash_trails = []
+        self.effect_sprites = EffectSprites()
+        self.health_bars = HealthBarAtlas(4, (60, 30, 30), (200, 80, 80))
+        self.render_queue = RenderQueue()
+        self.particles = ParticleSystem()
+        self.particles.add_emitter("dust", ParticleEmitter(PARTICLE_CAPACITY, alpha=120, drag=3.0))
+        self.particles.add_emitter("dash", ParticleEmitter(DASH_TRAIL_CAPACITY, alpha=200, min_size=3, min_alpha=30))
+        self.particles.add_emitter("spark", ParticleEmitter(PARTICLE_CAPACITY, alpha=230, drag=6.0))
+        self.particles.add_emitter("burst", ParticleEmitter(PARTICLE_CAPACITY, alpha=210, drag=4.0))
+        self.particle_layers = {"dust": LAYER_GROUND, "dash": LAYER_GROUND, "spark": LAYER_EFFECTS, "burst": LAYER_EFFECTS}
+        self.dust_timer = 0.0
+        self.dust_interval = 0.12
         self.dash_trail_timer = 0.0
         self.dash_trail_interval = 0.05
         self.dash_trail_lifetime = 0.22
 
         self.upgrade_popup_active = False
         self.upgrade_selected_index = 0
-        self.upgrade_option_rects = []
         self.all_upgrades = self.build_upgrade_choices()
         self.upgrade_choices = []
 
@@ -155,7 +190,6 @@ class Game:
         self.binding_menu_active = False
         self.binding_selected_index = 0
         self.binding_waiting_for_action = None
-        self.binding_option_rects = []
         self.binding_info_message = ""
         self.binding_info_timer = 0.0
         self.binding_info_duration = 2.0
@@ -163,12 +197,11 @@ class Game:
 
         self.menu_title_font = pygame.font.Font(None, 72)
         self.menu_options = [
-            {"label": "Jouer", "action": "play"},
+            {"label": "Jouer", "action": "play", "requires_assets": True},
             {"label": "Configurer ses touches", "action": "configure"},
-            {"label": "Charger la partie", "action": "save_load"},
+            {"label": "Charger la partie", "action": "save_load", "requires_assets": True},
         ]
         self.menu_selected_index = 0
-        self.menu_option_rects = []
         self.state = "menu"
 
         self.pause_menu_active = False
@@ -177,7 +210,6 @@ class Game:
             {"label": "Quitter", "action": "quit"},
         ]
         self.pause_selected_index = 0
-        self.pause_option_rects = []
         self.pause_info_message = ""
         self.pause_info_timer = 0.0
         self.pause_info_duration = 2.0
@@ -188,32 +220,94 @@ class Game:
             {"label": "Retour au menu", "action": "menu"},
         ]
         self.death_selected_index = 0
-        self.death_option_rects = []
 
+    @property
+    def boot_progress(self):
+        if not self.boot_jobs:
+            return 1.0
+        # The field jobs are only queued once the map is built, count them from the start
+        total = len(self.boot_jobs) + (len(BOOT_FIELD_TYPES) if self.map is None else 0)
+        return len(self.boot_results) / total
 
+    def poll_boot(self):
+        if self.assets_ready:
+            return
+        # Finish at most one job per frame so display conversion never stalls the menu
+        for name, job in self.boot_jobs.items():
+            if name not in self.boot_results and job.done():
+                self.boot_results[name] = job.result()
+                break
+        if len(self.boot_results) == len(self.boot_jobs):
+            if self.map is None:
+                self.load_map()
+            else:
+                self.finish_boot()
+
+    def load_map(self):
+        results = self.boot_results
+        map_path, collision_path = self.boot_paths
+        self.map = GameMap(map_path, collision_path, results["map_image"], results.get("map_collisions"))
+        # A fresh map or an edited collision file means baking the fields, which stays off the main thread
+        for collision_types in BOOT_FIELD_TYPES:
+            name = "field_" + "+".join(collision_types)
+            self.boot_jobs[name] = self.frame_loader.submit_call(self.map.distance_field, collision_types)
+
+    def finish_boot(self):
+        results = self.boot_results
+        enemy_clearance = self.get_enemy_radius("goblin1") - self.map.collision_margin
+        self.flow_field = FlowField(self.map, ENEMY_COLLISION_TYPES, enemy_clearance)
+        screen_w, screen_h = SCREEN_SIZE
+        self.map_offset = pygame.Vector2(
+            max(0, (screen_w - self.map.rect.width) / 2),
+            max(0, (screen_h - self.map.rect.height) / 2),
+        )
 
+        swordman_walk_frames = results["swordman_walk"]
+        swordman_attack_frames = results["swordman_attack"]
+        swordman_idle_frames = build_idle_frames(swordman_walk_frames)
+        player_clips = {
+            "idle": AnimationClip(swordman_idle_frames, fps=0, loop=False),
+            "walk": AnimationClip(swordman_walk_frames, fps=PLAYER_WALK_FPS, loop=True),
+            "attack": AnimationClip(swordman_attack_frames, fps=PLAYER_WALK_FPS, loop=False, duration=PLAYER_ATTACK_DURATION),
+        }
+        self.player = Player(self.map.rect.center, AnimationSet(player_clips))
+        self.player.radius = int(16 * self.swordman_scale)
+        self.player.position = self.random_spawn_point()
+        self.map.resolve_collisions(self.player.position, self.player.radius, PLAYER_COLLISION_TYPES)
+
+        self.boot_results = {}
+        self.assets_ready = True
 
     def random_spawn_point(self):
         spawn_positions = [pygame.Vector2(710, 953), pygame.Vector2(781, 1379), pygame.Vector2(1025, 1401), pygame.Vector2(1345, 1382), pygame.Vector2(1432, 946), pygame.Vector2(1399, 673), pygame.Vector2(1016, 797)]
         return random.choice(spawn_positions)
 
-    def make_enemy_anim(self, kind = "goblin1"):
-        template = self.enemy_anims.get(kind) or self.enemy_anims.get("goblin1")
-        data_copy = {}
-        for state, info in template.data.items():
-            data_copy[state] = {
-                "frames": info["frames"],
-                "fps": info.get("fps", 0),
-                "loop": info.get("loop", True),
-                "duration": info.get("duration"),
-            }
-        return AnimationSet(data_copy)
-
-    def clone_enemy_animation(self, kind = "goblin1"):
-        return self.make_enemy_anim(kind)
+    def spawn_enemy(self, kind, position, radius=None):
+        if radius is None:
+            radius = self.get_enemy_radius(kind)
+        clips = self.enemy_clips.get(kind) or self.enemy_clips["goblin1"]
+        return self.enemies.spawn(position, clips, radius, kind)
 
     def get_enemy_radius(self, kind):
-        return int(self.enemy_sizes.get(kind, self.enemy_sizes.get("goblin1", 10)))
+        if kind not in self.enemy_sizes:
+            kind = "goblin1"
+        return int(self.enemy_sizes[kind])
+
+    def prefetch_enemy_clips(self, kind):
+        for clip in self.enemy_clips[kind].values():
+            self.frame_cache.prefetch(clip.frames)
+
+    def poll_enemy_clips(self):
+        cache = self.frame_cache
+        cache.poll()
+        if not cache.failed:
+            return
+        fallback = self.enemy_clips["goblin1"]
+        for kind, clips in self.enemy_clips.items():
+            if clips is not fallback and any(clip.frames.key in cache.failed for clip in clips.values()):
+                # A sheet that fails to decode is replaced by the goblin1 set, enemies already out included
+                self.enemy_clips[kind] = fallback
+                self.enemies.replace_clips(clips, fallback)
 
     def goblin2_share_for_wave(self, wave):
         if wave < 5:
@@ -228,31 +322,38 @@ class Game:
 
     def start_wave(self):
         self.wave += 1
+        # Clips for a kind that shows up next wave decode in the background during this one
+        if self.goblin2_share_for_wave(self.wave + 1) > 0:
+            self.prefetch_enemy_clips("goblin2")
         count = 3 + (self.wave - 1) * 2
         goblin2_ratio = self.goblin2_share_for_wave(self.wave)
         goblin2_count = int(round(count * goblin2_ratio)) if goblin2_ratio > 0 else 0
         goblin1_count = max(0, count - goblin2_count)
         kinds = ["goblin2"] * goblin2_count + ["goblin1"] * goblin1_count
         random.shuffle(kinds)
-        self.enemies = [self.create_enemy(kind) for kind in kinds]
+        self.enemies.clear()
+        for kind in kinds:
+            self.create_enemy(kind)
         self.wave_active = True
         self.player.heal(self.player.max_health * 0.5)
 
     def create_enemy(self, kind):
-        angle = random.uniform(0, math.tau)
-        distance = random.uniform(self.spawn_radius_min, self.spawn_radius_max)
-        offset = pygame.Vector2(math.cos(angle), math.sin(angle)) * distance
-        spawn_position = self.player.position + offset
         radius = self.get_enemy_radius(kind)
-        enemy = Enemy(spawn_position, self.make_enemy_anim(kind), radius)
-        enemy.kind = kind
+        for _ in range(8):
+            angle = random.uniform(0, math.tau)
+            distance = random.uniform(self.spawn_radius_min, self.spawn_radius_max)
+            offset = pygame.Vector2(math.cos(angle), math.sin(angle)) * distance
+            spawn_position = self.player.position + offset
+            if self.map.is_spawn_valid(spawn_position, radius, ENEMY_COLLISION_TYPES):
+                break
+        self.map.resolve_collisions(spawn_position, radius, ENEMY_COLLISION_TYPES)
+        enemy = self.spawn_enemy(kind, spawn_position, radius)
 
         if kind == "goblin2":
             enemy.speed *= 1.3
             enemy.attack_damage *= 1.5
             enemy.max_health *= 2
             enemy.health = enemy.max_health
-        self.map.resolve_collisions(enemy.position, enemy.radius, ENEMY_COLLISION_TYPES)
         return enemy
 
     def world_to_screen(self, position):
@@ -405,13 +506,13 @@ class Game:
         self.binding_menu_active = True
         self.binding_selected_index = 0
         self.binding_waiting_for_action = None
-        self.binding_option_rects = []
+        self.ui_menus.forget("binding")
         self.show_binding_message("Sélectionne une action à modifier")
 
     def close_binding_menu(self):
         self.binding_menu_active = False
         self.binding_waiting_for_action = None
-        self.binding_option_rects = []
+        self.ui_menus.forget("binding")
 
     def show_pause_message(self, message):
         self.pause_info_message = message
@@ -425,14 +526,14 @@ class Game:
             return
         self.pause_menu_active = True
         self.pause_selected_index = 0
-        self.pause_option_rects = []
+        self.ui_menus.forget("pause")
         self.show_pause_message("")
 
     def close_pause_menu(self):
         if not self.pause_menu_active:
             return
         self.pause_menu_active = False
-        self.pause_option_rects = []
+        self.ui_menus.forget("pause")
         self.pause_selected_index = 0
         self.show_pause_message("")
 
@@ -451,24 +552,24 @@ class Game:
             return
         self.death_menu_active = True
         self.death_selected_index = 0
-        self.death_option_rects = []
+        self.ui_menus.forget("death")
         self.pause_menu_active = False
-        self.pause_option_rects = []
+        self.ui_menus.forget("pause")
         self.pause_selected_index = 0
         self.binding_menu_active = False
         self.binding_waiting_for_action = None
-        self.binding_option_rects = []
+        self.ui_menus.forget("binding")
         self.binding_info_message = ""
         self.binding_info_timer = 0.0
         self.upgrade_popup_active = False
-        self.upgrade_option_rects = []
+        self.ui_menus.forget("upgrade")
         self.state = "game_over"
 
     def close_death_menu(self):
         if not self.death_menu_active:
             return
         self.death_menu_active = False
-        self.death_option_rects = []
+        self.ui_menus.forget("death")
         self.death_selected_index = 0
 
     def activate_death_option(self, index):
@@ -485,20 +586,20 @@ class Game:
         self.close_pause_menu()
         self.close_death_menu()
         self.menu_selected_index = 0
-        self.menu_option_rects = []
+        self.ui_menus.forget("menu")
         self.binding_menu_active = False
         self.binding_waiting_for_action = None
-        self.binding_option_rects = []
+        self.ui_menus.forget("binding")
         self.binding_info_message = ""
         self.binding_info_timer = 0.0
         self.upgrade_popup_active = False
-        self.upgrade_option_rects = []
+        self.ui_menus.forget("upgrade")
         self.upgrade_choices = []
-        self.enemies = []
+        self.enemies.clear()
         self.wave = 0
         self.wave_active = False
         self.wave_timer = 0.0
-        self.dash_trails = []
+        self.particles.clear()
         self.dash_trail_timer = 0.0
         self.player.position = pygame.Vector2(SCREEN_CENTER)
         self.player.direction = pygame.Vector2(0, 1)
@@ -515,7 +616,7 @@ class Game:
         if self.state == "playing":
             return
         self.state = "playing"
-        self.menu_option_rects = []
+        self.ui_menus.forget("menu")
         self.menu_selected_index = 0
         self.close_death_menu()
         self.player.position = self.random_spawn_point()
@@ -526,17 +627,17 @@ class Game:
         self.player.dash_timer = 0.0
         self.player.dash_cooldown = 0.0
         self.player.animations.play("idle", restart=True)
-        self.dash_trails = []
+        self.particles.clear()
         self.dash_trail_timer = 0.0
-        self.enemies = []
+        self.enemies.clear()
         self.wave = 0
         self.wave_active = False
         self.wave_timer = 0.0
         self.upgrade_popup_active = False
-        self.upgrade_option_rects = []
+        self.ui_menus.forget("upgrade")
         self.upgrade_choices = []
         self.pause_menu_active = False
-        self.pause_option_rects = []
+        self.ui_menus.forget("pause")
         self.pause_selected_index = 0
         self.pause_info_message = ""
         self.pause_info_timer = 0.0
@@ -555,20 +656,21 @@ class Game:
             elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
                 self.activate_menu_option(self.menu_selected_index)
         elif event.type == pygame.MOUSEMOTION:
-            for index, rect in enumerate(self.menu_option_rects):
-                if rect.collidepoint(event.pos):
-                    self.menu_selected_index = index
-                    break
+            index = self.ui_menus.hit_test("menu", event.pos)
+            if index is not None:
+                self.menu_selected_index = index
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            for index, rect in enumerate(self.menu_option_rects):
-                if rect.collidepoint(event.pos):
-                    self.activate_menu_option(index)
-                    break
+            index = self.ui_menus.hit_test("menu", event.pos)
+            if index is not None:
+                self.activate_menu_option(index)
 
     def activate_menu_option(self, index):
         if not (0 <= index < len(self.menu_options)):
             return
-        action = self.menu_options[index]["action"]
+        option = self.menu_options[index]
+        if option.get("requires_assets") and not self.assets_ready:
+            return
+        action = option["action"]
         if action == "play":
             self.start_game()
         elif action == "configure":
@@ -602,22 +704,20 @@ class Game:
                 label = self.action_label(self.binding_waiting_for_action)
                 self.show_binding_message(f"Appuie sur une touche pour {label}")
         elif event.type == pygame.MOUSEMOTION:
-            for index, rect in enumerate(self.binding_option_rects):
-                if rect.collidepoint(event.pos):
-                    self.binding_selected_index = index
-                    break
+            index = self.ui_menus.hit_test("binding", event.pos)
+            if index is not None:
+                self.binding_selected_index = index
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             if self.binding_waiting_for_action is not None:
                 self.binding_waiting_for_action = None
                 self.show_binding_message("Assignation annulée")
                 return
-            for index, rect in enumerate(self.binding_option_rects):
-                if rect.collidepoint(event.pos):
-                    self.binding_selected_index = index
-                    self.binding_waiting_for_action = self.binding_options[index]["action"]
-                    label = self.action_label(self.binding_waiting_for_action)
-                    self.show_binding_message(f"Appuie sur une touche pour {label}")
-                    break
+            index = self.ui_menus.hit_test("binding", event.pos)
+            if index is not None:
+                self.binding_selected_index = index
+                self.binding_waiting_for_action = self.binding_options[index]["action"]
+                label = self.action_label(self.binding_waiting_for_action)
+                self.show_binding_message(f"Appuie sur une touche pour {label}")
 
     def handle_pause_menu_event(self, event):
         if event.type == pygame.KEYDOWN:
@@ -630,16 +730,14 @@ class Game:
             elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
                 self.activate_pause_option(self.pause_selected_index)
         elif event.type == pygame.MOUSEMOTION:
-            for index, rect in enumerate(self.pause_option_rects):
-                if rect.collidepoint(event.pos):
-                    self.pause_selected_index = index
-                    break
+            index = self.ui_menus.hit_test("pause", event.pos)
+            if index is not None:
+                self.pause_selected_index = index
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            for index, rect in enumerate(self.pause_option_rects):
-                if rect.collidepoint(event.pos):
-                    self.pause_selected_index = index
-                    self.activate_pause_option(index)
-                    break
+            index = self.ui_menus.hit_test("pause", event.pos)
+            if index is not None:
+                self.pause_selected_index = index
+                self.activate_pause_option(index)
 
     def handle_death_menu_event(self, event):
         if event.type == pygame.KEYDOWN:
@@ -652,15 +750,13 @@ class Game:
             elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
                 self.activate_death_option(self.death_selected_index)
         elif event.type == pygame.MOUSEMOTION:
-            for index, rect in enumerate(self.death_option_rects):
-                if rect.collidepoint(event.pos):
-                    self.death_selected_index = index
-                    break
+            index = self.ui_menus.hit_test("death", event.pos)
+            if index is not None:
+                self.death_selected_index = index
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            for index, rect in enumerate(self.death_option_rects):
-                if rect.collidepoint(event.pos):
-                    self.activate_death_option(index)
-                    break
+            index = self.ui_menus.hit_test("death", event.pos)
+            if index is not None:
+                self.activate_death_option(index)
 
     def _upgrade_max_health(self):
         bonus = max(10, int(self.player.max_health * 0.2))
@@ -695,7 +791,7 @@ class Game:
         self.upgrade_choices = random.sample(self.all_upgrades, k=sample_size)
         self.upgrade_popup_active = True
         self.upgrade_selected_index = 0
-        self.upgrade_option_rects = []
+        self.ui_menus.forget("upgrade")
         self.player.animations.play("idle", restart=True)
         self.player.attack_timer = 0.0
         self.player.dash_timer = 0.0
@@ -711,16 +807,14 @@ class Game:
             elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
                 self.apply_selected_upgrade()
         elif event.type == pygame.MOUSEMOTION:
-            for index, rect in enumerate(self.upgrade_option_rects):
-                if rect.collidepoint(event.pos):
-                    self.upgrade_selected_index = index
-                    break
+            index = self.ui_menus.hit_test("upgrade", event.pos)
+            if index is not None:
+                self.upgrade_selected_index = index
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            for index, rect in enumerate(self.upgrade_option_rects):
-                if rect.collidepoint(event.pos):
-                    self.upgrade_selected_index = index
-                    self.apply_selected_upgrade()
-                    break
+            index = self.ui_menus.hit_test("upgrade", event.pos)
+            if index is not None:
+                self.upgrade_selected_index = index
+                self.apply_selected_upgrade()
 
     def apply_selected_upgrade(self):
         if not self.upgrade_choices:
@@ -729,13 +823,17 @@ class Game:
         choice = self.upgrade_choices[self.upgrade_selected_index]
         choice["apply"]()
         self.upgrade_popup_active = False
-        self.upgrade_option_rects = []
+        self.ui_menus.forget("upgrade")
         self.wave_timer = max(self.wave_timer, self.wave_delay)
 
     def draw_upgrade_overlay(self):
-        overlay = pygame.Surface(SCREEN_SIZE, pygame.SRCALPHA)
-        overlay.fill((12, 12, 18, 210))
-        self.screen.blit(overlay, (0, 0))
+        # Keyed on content, a fresh list can reuse the address of the one it replaced
+        key = (tuple(choice["key"] for choice in self.upgrade_choices), self.upgrade_selected_index)
+        self.ui_menus.get("upgrade", key, self.build_upgrade_overlay).draw(self.screen)
+
+    def build_upgrade_overlay(self):
+        menu = Menu(SCREEN_SIZE, (12, 12, 18, 210))
+        render = self.text_cache.render
 
         center_x = SCREEN_SIZE[0] // 2
         center_y = SCREEN_SIZE[1] // 2
@@ -746,15 +844,10 @@ class Game:
         total_height = len(self.upgrade_choices) * box_height + (len(self.upgrade_choices) - 1) * spacing
         start_y = center_y - total_height // 2
 
-        title_surface = self.upgrade_title_font.render("Amélioration disponible", True, (240, 240, 240))
-        title_rect = title_surface.get_rect(center=(center_x, start_y - 60))
-        self.screen.blit(title_surface, title_rect)
-
-        instruction_surface = self.upgrade_description_font.render("Entrée pour valider · Échap pour quitter", True, (200, 200, 200))
-        instruction_rect = instruction_surface.get_rect(center=(center_x, start_y + total_height + 40))
-        self.screen.blit(instruction_surface, instruction_rect)
+        menu.add(Label(render(self.upgrade_title_font, "Amélioration disponible", (240, 240, 240)), center=(center_x, start_y - 60)))
+        instruction = "Entrée pour valider · Échap pour quitter"
+        menu.add(Label(render(self.upgrade_description_font, instruction, (200, 200, 200)), center=(center_x, start_y + total_height + 40)))
 
-        option_rects = []
         for index, choice in enumerate(self.upgrade_choices):
             rect = pygame.Rect(0, 0, box_width, box_height)
             rect.centerx = center_x
@@ -764,39 +857,28 @@ class Game:
             base_color = (54, 58, 84) if is_selected else (36, 38, 56)
             border_color = (120, 140, 220) if is_selected else (80, 86, 120)
 
-            pygame.draw.rect(self.screen, base_color, rect, border_radius=10)
-            pygame.draw.rect(self.screen, border_color, rect, width=2, border_radius=10)
-
-            label_surface = self.upgrade_option_font.render(choice["label"], True, (240, 240, 240))
-            label_rect = label_surface.get_rect()
-            label_rect.topleft = (rect.x + 20, rect.y + 8)
-            self.screen.blit(label_surface, label_rect)
-
-            description_surface = self.upgrade_description_font.render(choice["description"], True, (200, 200, 200))
-            description_rect = description_surface.get_rect()
-            description_rect.topleft = (rect.x + 20, rect.y + 36)
-            self.screen.blit(description_surface, description_rect)
-
-            option_rects.append(rect)
+            label = Label(render(self.upgrade_option_font, choice["label"], (240, 240, 240)), topleft=(rect.x + 20, rect.y + 8))
+            description = Label(
+                render(self.upgrade_description_font, choice["description"], (200, 200, 200)),
+                topleft=(rect.x + 20, rect.y + 36),
+            )
+            menu.add_button(Box(rect, base_color, border_color, 10, (label, description)))
 
-        self.upgrade_option_rects = option_rects
+        return menu
 
     def draw_pause_menu(self):
-        overlay = pygame.Surface(SCREEN_SIZE, pygame.SRCALPHA)
-        overlay.fill((10, 12, 22, 200))
-        self.screen.blit(overlay, (0, 0))
+        self.ui_menus.get("pause", self.pause_selected_index, self.build_pause_menu).draw(self.screen)
+
+    def build_pause_menu(self):
+        menu = Menu(SCREEN_SIZE, (10, 12, 22, 200))
+        render = self.text_cache.render
 
         center_x = SCREEN_SIZE[0] // 2
         center_y = SCREEN_SIZE[1] // 2
 
-        title_surface = self.menu_title_font.render("Pause", True, (240, 240, 240))
-        title_rect = title_surface.get_rect(center=(center_x, center_y - 180))
-        self.screen.blit(title_surface, title_rect)
-
+        menu.add(Label(render(self.menu_title_font, "Pause", (240, 240, 240)), center=(center_x, center_y - 180)))
         instruction = "Entrée pour valider · Échap pour reprendre"
-        instruction_surface = self.upgrade_description_font.render(instruction, True, (200, 200, 200))
-        instruction_rect = instruction_surface.get_rect(center=(center_x, center_y + 200))
-        self.screen.blit(instruction_surface, instruction_rect)
+        menu.add(Label(render(self.upgrade_description_font, instruction, (200, 200, 200)), center=(center_x, center_y + 200)))
 
         box_width = 400
         box_height = 62
@@ -804,7 +886,6 @@ class Game:
         total_height = len(self.pause_menu_options) * box_height + (len(self.pause_menu_options) - 1) * spacing
         start_y = center_y - total_height // 2
 
-        option_rects = []
         for index, option in enumerate(self.pause_menu_options):
             rect = pygame.Rect(0, 0, box_width, box_height)
             rect.centerx = center_x
@@ -814,38 +895,27 @@ class Game:
             base_color = (52, 56, 78) if is_selected else (34, 36, 52)
             border_color = (150, 170, 240) if is_selected else (84, 92, 132)
 
-            pygame.draw.rect(self.screen, base_color, rect, border_radius=10)
-            pygame.draw.rect(self.screen, border_color, rect, width=2, border_radius=10)
+            label = Label(render(self.upgrade_option_font, option["label"], (240, 240, 240)), center=rect.center)
+            menu.add_button(Box(rect, base_color, border_color, 10, (label,)))
 
-            label_surface = self.upgrade_option_font.render(option["label"], True, (240, 240, 240))
-            label_rect = label_surface.get_rect(center=rect.center)
-            self.screen.blit(label_surface, label_rect)
-
-            option_rects.append(rect)
-
-        self.pause_option_rects = option_rects
+        return menu
 
     def draw_death_menu(self):
-        overlay = pygame.Surface(SCREEN_SIZE, pygame.SRCALPHA)
-        overlay.fill((22, 8, 12, 220))
-        self.screen.blit(overlay, (0, 0))
+        key = (self.death_selected_index, self.wave)
+        self.ui_menus.get("death", key, self.build_death_menu).draw(self.screen)
+
+    def build_death_menu(self):
+        menu = Menu(SCREEN_SIZE, (22, 8, 12, 220))
+        render = self.text_cache.render
 
         center_x = SCREEN_SIZE[0] // 2
         center_y = SCREEN_SIZE[1] // 2
 
-        title_surface = self.menu_title_font.render("Tu es mort", True, (250, 220, 220))
-        title_rect = title_surface.get_rect(center=(center_x, center_y - 190))
-        self.screen.blit(title_surface, title_rect)
-
+        title = menu.add(Label(render(self.menu_title_font, "Tu es mort", (250, 220, 220)), center=(center_x, center_y - 190)))
         wave_text = f"Vague atteinte : {self.wave}"
-        wave_surface = self.upgrade_option_font.render(wave_text, True, (230, 210, 210))
-        wave_rect = wave_surface.get_rect(center=(center_x, title_rect.bottom + 40))
-        self.screen.blit(wave_surface, wave_rect)
-
+        menu.add(Label(render(self.upgrade_option_font, wave_text, (230, 210, 210)), center=(center_x, title.rect.bottom + 40)))
         instruction = "Entrée pour valider · Échap pour retourner au menu"
-        instruction_surface = self.upgrade_description_font.render(instruction, True, (210, 200, 200))
-        instruction_rect = instruction_surface.get_rect(center=(center_x, center_y + 210))
-        self.screen.blit(instruction_surface, instruction_rect)
+        menu.add(Label(render(self.upgrade_description_font, instruction, (210, 200, 200)), center=(center_x, center_y + 210)))
 
         box_width = 420
         box_height = 64
@@ -853,7 +923,6 @@ class Game:
         total_height = len(self.death_menu_options) * box_height + (len(self.death_menu_options) - 1) * spacing
         start_y = center_y - total_height // 2
 
-        option_rects = []
         for index, option in enumerate(self.death_menu_options):
             rect = pygame.Rect(0, 0, box_width, box_height)
             rect.centerx = center_x
@@ -863,29 +932,27 @@ class Game:
             base_color = (80, 36, 44) if is_selected else (48, 22, 28)
             border_color = (220, 140, 150) if is_selected else (120, 70, 80)
 
-            pygame.draw.rect(self.screen, base_color, rect, border_radius=12)
-            pygame.draw.rect(self.screen, border_color, rect, width=2, border_radius=12)
+            label = Label(render(self.upgrade_option_font, option["label"], (250, 236, 236)), center=rect.center)
+            menu.add_button(Box(rect, base_color, border_color, 12, (label,)))
 
-            label_surface = self.upgrade_option_font.render(option["label"], True, (250, 236, 236))
-            label_rect = label_surface.get_rect(center=rect.center)
-            self.screen.blit(label_surface, label_rect)
+        return menu
 
-            option_rects.append(rect)
+    def draw_menu(self):
+        progress = None if self.assets_ready else int(self.boot_progress * 100)
+        key = (self.menu_selected_index, progress)
+        self.ui_menus.get("menu", key, self.build_menu).draw(self.screen)
 
-        self.death_option_rects = option_rects
+    def build_menu(self):
+        # The title screen covers the whole window, an opaque layer keeps it identical to drawing straight on screen
+        menu = Menu(SCREEN_SIZE, BACKGROUND_COLOR)
+        render = self.text_cache.render
 
-    def draw_menu(self):
         center_x = SCREEN_SIZE[0] // 2
         center_y = SCREEN_SIZE[1] // 2
 
-        title_surface = self.menu_title_font.render("adhess", True, (240, 240, 240))
-        title_rect = title_surface.get_rect(center=(center_x, center_y - 200))
-        self.screen.blit(title_surface, title_rect)
-
-        instruction_text = "Entrée pour valider · Échap pour quitter"
-        instruction_surface = self.upgrade_description_font.render(instruction_text, True, (200, 200, 200))
-        instruction_rect = instruction_surface.get_rect(center=(center_x, center_y + 200))
-        self.screen.blit(instruction_surface, instruction_rect)
+        menu.add(Label(render(self.menu_title_font, "adhess", (240, 240, 240)), center=(center_x, center_y - 200)))
+        instruction = "Entrée pour valider · Échap pour quitter"
+        menu.add(Label(render(self.upgrade_description_font, instruction, (200, 200, 200)), center=(center_x, center_y + 200)))
 
         box_width = 480
         box_height = 64
@@ -893,39 +960,56 @@ class Game:
         total_height = len(self.menu_options) * box_height + (len(self.menu_options) - 1) * spacing
         start_y = center_y - total_height // 2
 
-        option_rects = []
         for index, option in enumerate(self.menu_options):
             rect = pygame.Rect(0, 0, box_width, box_height)
             rect.centerx = center_x
             rect.y = start_y + index * (box_height + spacing)
 
             is_selected = index == self.menu_selected_index
+            is_disabled = option.get("requires_assets") and not self.assets_ready
             base_color = (46, 50, 74) if is_selected else (28, 30, 44)
             border_color = (150, 170, 240) if is_selected else (78, 86, 128)
+            label_color = (110, 110, 120) if is_disabled else (240, 240, 240)
 
-            pygame.draw.rect(self.screen, base_color, rect, border_radius=12)
-            pygame.draw.rect(self.screen, border_color, rect, width=2, border_radius=12)
+            label = Label(render(self.upgrade_option_font, option["label"], label_color), center=rect.center)
+            menu.add_button(Box(rect, base_color, border_color, 12, (label,)))
 
-            label_surface = self.upgrade_option_font.render(option["label"], True, (240, 240, 240))
-            label_rect = label_surface.get_rect(center=rect.center)
-            self.screen.blit(label_surface, label_rect)
+        if not self.assets_ready:
+            progress = self.boot_progress
+            loading_text = f"Chargement… {int(progress * 100)}%"
+            loading = menu.add(
+                Label(render(self.upgrade_description_font, loading_text, (200, 200, 200)), center=(center_x, start_y + total_height + 36))
+            )
 
-            option_rects.append(rect)
+            bar_rect = pygame.Rect(0, 0, box_width, 8)
+            bar_rect.midtop = (center_x, loading.rect.bottom + 8)
+            fill_rect = pygame.Rect(bar_rect.x, bar_rect.y, int(bar_rect.width * progress), bar_rect.height)
+            menu.add(Box(bar_rect, (40, 42, 58), border_radius=4))
+            menu.add(Box(fill_rect, (150, 170, 240), border_radius=4))
 
-        self.menu_option_rects = option_rects
+        return menu
 
     def draw_binding_menu(self):
-        overlay = pygame.Surface(SCREEN_SIZE, pygame.SRCALPHA)
-        overlay.fill((8, 10, 18, 220))
-        self.screen.blit(overlay, (0, 0))
+        info = self.binding_info_message if self.binding_info_timer > 0.0 else ""
+        key = (
+            self.binding_selected_index,
+            self.binding_waiting_for_action,
+            info,
+            self.binding_menu_key,
+            tuple(self.binding_text(option["action"]) for option in self.binding_options),
+        )
+        self.ui_menus.get("binding", key, self.build_binding_menu).draw(self.screen)
+
+    def build_binding_menu(self):
+        menu = Menu(SCREEN_SIZE, (8, 10, 18, 220))
+        render = self.text_cache.render
 
         center_x = SCREEN_SIZE[0] // 2
         center_y = SCREEN_SIZE[1] // 2
 
-        title = "Configuration des touches"
-        title_surface = self.upgrade_title_font.render(title, True, (240, 240, 240))
-        title_rect = title_surface.get_rect(center=(center_x, center_y - 200))
-        self.screen.blit(title_surface, title_rect)
+        title = menu.add(
+            Label(render(self.upgrade_title_font, "Configuration des touches", (240, 240, 240)), center=(center_x, center_y - 200))
+        )
 
         waiting = self.binding_waiting_for_action is not None
         if waiting:
@@ -933,14 +1017,11 @@ class Game:
         else:
             toggle_name = self.key_name(self.binding_menu_key)
             instruction_text = f"Entrée/Espace pour modifier · {toggle_name} ou Échap pour fermer"
-        instruction_surface = self.upgrade_description_font.render(instruction_text, True, (200, 200, 200))
-        instruction_rect = instruction_surface.get_rect(center=(center_x, center_y + 200))
-        self.screen.blit(instruction_surface, instruction_rect)
+        menu.add(Label(render(self.upgrade_description_font, instruction_text, (200, 200, 200)), center=(center_x, center_y + 200)))
 
         if self.binding_info_timer > 0.0 and self.binding_info_message:
-            info_surface = self.upgrade_option_font.render(self.binding_info_message, True, (220, 220, 220))
-            info_rect = info_surface.get_rect(center=(center_x, title_rect.bottom + 30))
-            self.screen.blit(info_surface, info_rect)
+            info_surface = render(self.upgrade_option_font, self.binding_info_message, (220, 220, 220))
+            menu.add(Label(info_surface, center=(center_x, title.rect.bottom + 30)))
 
         box_width = 560
         box_height = 58
@@ -948,7 +1029,6 @@ class Game:
         total_height = len(self.binding_options) * box_height + (len(self.binding_options) - 1) * spacing
         start_y = center_y - total_height // 2
 
-        option_rects = []
         for index, option in enumerate(self.binding_options):
             rect = pygame.Rect(0, 0, box_width, box_height)
             rect.centerx = center_x
@@ -962,23 +1042,12 @@ class Game:
                 base_color = (70, 58, 40)
                 border_color = (220, 180, 120)
 
-            pygame.draw.rect(self.screen, base_color, rect, border_radius=10)
-            pygame.draw.rect(self.screen, border_color, rect, width=2, border_radius=10)
-
-            label_surface = self.upgrade_option_font.render(option["label"], True, (240, 240, 240))
-            label_rect = label_surface.get_rect()
-            label_rect.midleft = (rect.x + 20, rect.centery)
-            self.screen.blit(label_surface, label_rect)
+            label = Label(render(self.upgrade_option_font, option["label"], (240, 240, 240)), midleft=(rect.x + 20, rect.centery))
+            binding_text = self.binding_text(option["action"])
+            binding = Label(render(self.upgrade_description_font, binding_text, (210, 210, 210)), midright=(rect.right - 20, rect.centery))
+            menu.add_button(Box(rect, base_color, border_color, 10, (label, binding)))
 
-            btxt = self.binding_text(option["action"]) 
-            binding_surface = self.upgrade_description_font.render(btxt, True, (210, 210, 210))
-            binding_rect = binding_surface.get_rect()
-            binding_rect.midright = (rect.right - 20, rect.centery)
-            self.screen.blit(binding_surface, binding_rect)
-
-            option_rects.append(rect)
-
-        self.binding_option_rects = option_rects
+        return menu
 
     def handle_events(self):
         for event in pygame.event.get():
@@ -1027,15 +1096,15 @@ class Game:
                         self.dash_trail_timer = self.dash_trail_interval
 
     def add_dash_effect(self):
-        self.dash_trails.append({"pos": self.player.position.copy(), "life": self.dash_trail_lifetime})
+        self.particles["dash"].emit(self.player.position, life=self.dash_trail_lifetime, size=18)
 
     def apply_attack(self):
         center = self.player.position + self.player.direction * self.player.attack_reach
-        reach = self.player.attack_radius
-        for enemy in self.enemies:
-            total_radius = reach + enemy.radius
-            if (enemy.position - center).length_squared() <= total_radius * total_radius:
-                enemy.take_damage(self.player.attack_damage)
+        hits = self.enemies.damage_circle(center, self.player.attack_radius, self.player.attack_damage)
+        sparks = self.particles["spark"]
+        for x, y in hits.tolist():
+            direction = math.atan2(y - self.player.position.y, x - self.player.position.x)
+            sparks.emit((x, y), 6, speed=260.0, life=0.25, size=3, color=(255, 226, 150), direction=direction, spread=1.6)
 
     def update_paused_view(self, dt: float, camera_target: pygame.Vector2):
         # Common updates when gameplay is paused/menu/upgrade/death
@@ -1043,9 +1112,7 @@ class Game:
         self.player.animations.update(dt)
         self.player.damage_flash = max(0.0, self.player.damage_flash - dt)
         self.dash_trail_timer = 0.0
-        for effect in self.dash_trails:
-            effect["life"] = max(0.0, effect["life"] - dt)
-        self.dash_trails = [effect for effect in self.dash_trails if effect["life"] > 0]
+        self.particles.update(dt)
         self.camera = pygame.Vector2(camera_target)
 
     def update(self, dt):
@@ -1056,6 +1123,11 @@ class Game:
             if self.pause_info_timer <= 0.0:
                 self.pause_info_message = ""
 
+        if not self.assets_ready:
+            self.poll_boot()
+            return
+        self.poll_enemy_clips()
+
         if self.binding_menu_active:
             self.update_paused_view(dt, camera_target=self.player.position - SCREEN_CENTER)
             return
@@ -1079,7 +1151,11 @@ class Game:
         pressed = pygame.key.get_pressed()
 
         move_vector = self.get_move_input(pressed)
+        previous_position = self.player.position.copy()
         self.player.update(dt, move_vector)
+        self.player.position.update(
+            self.map.sweep_circle(previous_position, self.player.position, self.player.radius, PLAYER_COLLISION_TYPES)
+        )
         self.map.resolve_collisions(self.player.position, self.player.radius, PLAYER_COLLISION_TYPES)
 
         if self.player.dash_timer > 0:
@@ -1089,18 +1165,27 @@ class Game:
                 self.dash_trail_timer = self.dash_trail_interval
         else:
             self.dash_trail_timer = 0.0
+        if move_vector.length_squared() > 0 and self.player.dash_timer <= 0:
+            self.dust_timer -= dt
+            if self.dust_timer <= 0.0:
+                feet = (self.player.position.x, self.player.position.y + self.player.radius * 0.8)
+                self.particles["dust"].emit(feet, 3, speed=40.0, life=0.4, size=4, color=(150, 132, 104), direction=-math.pi / 2, spread=2.4)
+                self.dust_timer = self.dust_interval
+        else:
+            self.dust_timer = 0.0
 
-        for effect in self.dash_trails:
-            effect["life"] -= dt
-        self.dash_trails = [effect for effect in self.dash_trails if effect["life"] > 0]
+        self.particles.update(dt)
 
-        for enemy in self.enemies:
-            enemy.update(dt, self.player.position)
-            self.map.resolve_collisions(enemy.position, enemy.radius, ENEMY_COLLISION_TYPES)
-            if enemy.ready_to_attack(self.player.position, self.player.radius):
-                self.player.take_damage(enemy.attack_damage)
-                break
-        self.enemies = [enemy for enemy in self.enemies if not enemy.is_dead]
+        self.flow_field.update(self.player.position)
+        self.enemies.update(dt, self.player.position, self.flow_field)
+        # Separation pushes run first so the wall pass has the last word
+        self.enemies.separate()
+        self.enemies.resolve_collisions(self.map, ENEMY_COLLISION_TYPES)
+        damage = self.enemies.attack(self.player.position, self.player.radius)
+        if damage:
+            self.player.take_damage(damage)
+        for position in self.enemies.remove_dead().tolist():
+            self.particles["burst"].emit(position, 14, speed=180.0, life=0.45, size=5, color=(150, 40, 40))
 
         if self.wave_active and not self.enemies:
             self.wave_active = False
@@ -1124,76 +1209,77 @@ class Game:
         self.camera.x = max(0, min(desired_camera.x, max_x))
         self.camera.y = max(0, min(desired_camera.y, max_y))
 
-    def draw_dash_trails(self):
-        for effect in self.dash_trails:
-            ratio = effect["life"] / self.dash_trail_lifetime if self.dash_trail_lifetime else 0.0
-            size = max(3, int(18 * ratio))
-            alpha = max(30, int(200 * ratio))
-            surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
-            pygame.draw.circle(surface, (255, 255, 255, alpha), (size, size), size)
-            pos = self.world_to_screen(effect["pos"])
-            self.screen.blit(surface, (int(pos.x - size), int(pos.y - size)))
+    def draw_particles(self):
+        offset = self.map_offset - self.camera
+        for name, emitter in self.particles.emitters.items():
+            blits = emitter.blits(offset, self.effect_sprites)
+            if blits:
+                self.render_queue.submit(("particles", name), self.particle_layers[name], 0.0, blits)
 
     def draw_player(self):
         sprite = self.player.current_frame()
         screen_position = self.world_to_screen(self.player.position)
         rect = sprite.get_rect(center=(int(screen_position.x), int(screen_position.y)))
-        self.screen.blit(sprite, rect)
+        blits = [(sprite, rect)]
 
         if self.player.damage_flash > 0:
             ratio = self.player.damage_flash / PLAYER_DAMAGE_FLASH_DURATION if PLAYER_DAMAGE_FLASH_DURATION else 0.0
             radius = max(12, int(self.player.radius * 1.6))
-            size = radius * 2
-            flash_surface = pygame.Surface((size, size), pygame.SRCALPHA)
-            alpha = int(200 * ratio)
-            pygame.draw.circle(flash_surface, (255, 80, 80, alpha), (radius, radius), radius)
-            self.screen.blit(flash_surface, (int(screen_position.x - radius), int(screen_position.y - radius)))
+            flash_surface = self.effect_sprites.circle((255, 80, 80), radius, 200 * ratio)
+            blits.append((flash_surface, (int(screen_position.x - radius), int(screen_position.y - radius))))
+        foot = self.player.position.y + self.player.radius
+        self.render_queue.submit("player", LAYER_ENTITIES, foot, blits)
 
     def draw_enemies(self):
-        for enemy in self.enemies:
-            screen_pos = self.world_to_screen(enemy.position)
-            sprite = enemy.current_frame()
+        pool = self.enemies
+        view = pygame.Rect(self.camera - self.map_offset, self.screen.get_size())
+        visible = pool.visible(view, ENEMY_DRAW_MARGIN)
+        if visible.size == 0:
+            return
+        xs = (pool.position[visible, 0] - self.camera.x + self.map_offset.x).tolist()
+        ys = (pool.position[visible, 1] - self.camera.y + self.map_offset.y).tolist()
+        radii = pool.radius[visible].tolist()
+        ratios = np.maximum(0.0, pool.health[visible] / pool.max_health[visible]).tolist()
+        feet = (pool.position[visible, 1] + pool.radius[visible]).tolist()
+        ids = pool.ids[visible].tolist()
+        health_bars = self.health_bars
+        submit = self.render_queue.submit
+        for index, ident, x, y, radius, ratio, foot in zip(visible.tolist(), ids, xs, ys, radii, ratios, feet):
+            blits = []
+            sprite = pool.frame(index)
             if sprite is not None:
-                rect = sprite.get_rect(center=(int(screen_pos.x), int(screen_pos.y)))
-                self.screen.blit(sprite, rect)
-
-            bar_width = max(20, enemy.radius * 2)
-            bar_height = 4
-            bar_x = int(screen_pos.x - bar_width / 2)
-            bar_y = int(screen_pos.y + enemy.radius + 4)
-            pygame.draw.rect(self.screen, (60, 30, 30), (bar_x, bar_y, bar_width, bar_height))
-            pygame.draw.rect(
-                self.screen,
-                (200, 80, 80),
-                (bar_x, bar_y, int(bar_width * enemy.health_ratio), bar_height),
-            )
+                width, height = sprite.get_size()
+                blits.append((sprite, (int(x) - width // 2, int(y) - height // 2)))
+            bar_width = int(max(20, radius * 2))
+            bar, area = health_bars.bar(bar_width, ratio)
+            blits.append((bar, (int(x - bar_width / 2), int(y + radius + 4)), area))
+            submit(("enemy", ident), LAYER_ENTITIES, foot, blits)
 
     def draw_debug_overlay(self):
         if not self.debug_show_collisions:
             return
-
-        overlay = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
-        offset_x = -self.camera.x + self.map_offset.x
-        offset_y = -self.camera.y + self.map_offset.y
-
-        type_styles = {
-            "interior": ((255, 60, 60, 60), (255, 80, 80, 180)),
-            "exterior": ((60, 120, 255, 60), (80, 160, 255, 180)),
-        }
-        default_style = ((255, 60, 60, 60), (255, 80, 80, 180))
-
-        for rect, rect_type in self.map.iter_collision_entries():
-            debug_rect = pygame.Rect(rect)
-            debug_rect.x = int(debug_rect.x + offset_x)
-            debug_rect.y = int(debug_rect.y + offset_y)
-            fill_color, outline_color = type_styles.get(rect_type, default_style)
-            pygame.draw.rect(overlay, fill_color, debug_rect)
-            pygame.draw.rect(overlay, outline_color, debug_rect, 2)
-
-        info_lines = [
+        self.map.draw_collisions(self.screen, self.camera, self.map_offset, DEBUG_COLLISION_STYLES, DEBUG_DEFAULT_STYLE)
+        panel = self.debug_panel()
+        self.screen.blit(panel, (self.screen.get_width() - panel.get_width() - 20, 20))
+
+    def debug_panel(self):
+        now = pygame.time.get_ticks()
+        # Counters move every frame, the panel only follows them a few times per second
+        if self.debug_panel_surface is not None and now - self.debug_panel_time < DEBUG_PANEL_INTERVAL_MS:
+            return self.debug_panel_surface
+        self.debug_panel_time = now
+
+        cache = self.frame_cache
+        info_lines = (
             "[F1] collisions",
             "Click to get collisinos",
-        ]
+            f"Frame cache: {cache.hits} hits / {cache.misses} misses ({hit_rate(cache.hits, cache.misses):.0%})",
+            f"Frame cache: {len(cache.clips)} clips, {cache.used_bytes / 1048576:.1f}/{cache.budget_bytes / 1048576:.0f} MB",
+            f"Text cache: {len(self.text_cache.surfaces)} lines ({hit_rate(self.text_cache.hits, self.text_cache.misses):.0%})",
+        )
+        if info_lines == self.debug_panel_lines:
+            return self.debug_panel_surface
+        self.debug_panel_lines = info_lines
 
         max_width = max(self.debug_font.size(line)[0] for line in info_lines)
         line_height = self.debug_font.get_linesize()
@@ -1202,12 +1288,13 @@ class Game:
         info_surface = pygame.Surface((max_width + padding * 2, info_height + padding * 2), pygame.SRCALPHA)
         info_surface.fill((20, 20, 20, 190))
 
+        # Counter lines change between refreshes, going through the text cache would only evict the menu and HUD lines
         for index, line in enumerate(info_lines):
             line_surface = self.debug_font.render(line, True, (240, 240, 240))
             info_surface.blit(line_surface, (padding, padding + index * line_height))
 
-        overlay.blit(info_surface, (self.screen.get_width() - info_surface.get_width() - 20, 20))
-        self.screen.blit(overlay, (0, 0))
+        self.debug_panel_surface = info_surface
+        return info_surface
 
     def draw_ui(self):
         lines = [
@@ -1222,23 +1309,26 @@ class Game:
                 lines.append(f"Prochaine vague dans {self.wave_timer:.1f}s")
         lines.append(f"{self.key_name(self.binding_menu_key)}: configurer les touches")
         for index, text in enumerate(lines):
-            surface = self.font.render(text, True, (0, 0, 0))
-            self.screen.blit(surface, (20, 20 + index * 22))
+            surface = self.text_cache.render(self.font, text, (0, 0, 0))
+            self.frame_rects.append(self.screen.blit(surface, (20, 20 + index * 22)))
 
     def draw(self):
+        if self.dirty_rendering:
+            self.draw_dirty()
+            return
+        self.draw_frame()
+        pygame.display.flip()
+
+    def draw_frame(self):
+        self.frame_rects = []
         self.screen.fill(BACKGROUND_COLOR)
         if self.state == "menu":
             self.draw_menu()
             if self.binding_menu_active:
                 self.draw_binding_menu()
-            pygame.display.flip()
             return
         self.map.draw(self.screen, self.camera, self.map_offset)
-        self.draw_enemies()
-        self.draw_dash_trails()
-        self.draw_player()
-        self.draw_debug_overlay()
-        self.draw_ui()
+        self.draw_world()
         if self.binding_menu_active:
             self.draw_binding_menu()
         if self.death_menu_active:
@@ -1247,7 +1337,65 @@ class Game:
             self.draw_upgrade_overlay()
         if self.pause_menu_active:
             self.draw_pause_menu()
-        pygame.display.flip()
+
+    def draw_world(self):
+        self.draw_particles()
+        self.draw_enemies()
+        self.draw_player()
+        self.frame_rects.extend(self.render_queue.flush(self.screen))
+        self.draw_debug_overlay()
+        self.draw_ui()
+
+    def static_screen_key(self):
+        bindings = None
+        if self.binding_menu_active:
+            bindings = (
+                self.binding_selected_index,
+                self.binding_waiting_for_action,
+                self.binding_info_timer > 0.0,
+                self.binding_info_message,
+                tuple((action, tuple(keys)) for action, keys in self.key_bindings.items()),
+            )
+        if self.state == "menu":
+            return ("menu", self.menu_selected_index, self.assets_ready, int(self.boot_progress * 100), bindings)
+        if not (self.binding_menu_active or self.death_menu_active or self.upgrade_popup_active or self.pause_menu_active):
+            return None
+        if self.particles or self.player.damage_flash > 0:
+            # The world under the overlay is still fading out, never equal to the previous frame
+            return object()
+        return (
+            bindings,
+            self.death_menu_active and (self.death_selected_index, self.wave),
+            self.upgrade_popup_active and (tuple(choice["key"] for choice in self.upgrade_choices), self.upgrade_selected_index),
+            self.pause_menu_active and self.pause_selected_index,
+        )
+
+    def draw_dirty(self):
+        key = self.static_screen_key()
+        if key is not None:
+            # Menus and overlays only change with input, skip the frame while their state holds
+            if key != self.last_screen_key:
+                self.draw_frame()
+                pygame.display.flip()
+            self.last_screen_key = key
+            self.last_camera = None
+            return
+
+        self.last_screen_key = None
+        # Placeholder tiles are replaced by a full redraw once their chunk has been read
+        if self.camera != self.last_camera or self.debug_show_collisions or self.map.chunks.waiting:
+            self.draw_frame()
+            pygame.display.flip()
+        else:
+            # Put the background back where anything was drawn last frame, then redraw every sprite on top
+            for rect in self.previous_rects:
+                self.screen.fill(BACKGROUND_COLOR, rect)
+                self.map.draw(self.screen, self.camera, self.map_offset, rect)
+            self.frame_rects = []
+            self.draw_world()
+            pygame.display.update(self.previous_rects + self.frame_rects)
+        self.previous_rects = self.frame_rects
+        self.last_camera = pygame.Vector2(self.camera)
 
     def run(self):
         while self.running:
@@ -1256,9 +1404,10 @@ class Game:
             self.update(dt)
             self.draw()
 
+        self.frame_loader.close()
         pygame.quit()
         sys.exit()
 
 
 def main():
-    Game().run()
+    Game(dirty_rendering="--dirty-rects" in sys.argv[1:]).run()
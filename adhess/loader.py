@@ -0,0 +1,44 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from adhess.animations import split_directions
+from adhess.atlas import load_atlas, slice_sheet
+
+
+def _finish_frames(frames_per_direction, direction_order, decoded):
+    return split_directions(slice_sheet(*decoded), frames_per_direction, direction_order)
+
+
+class LoadJob:
+    def __init__(self, future, finish=None):
+        self.future = future
+        self.finish = finish
+        self._finished = False
+        self._value = None
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        if not self._finished:
+            value = self.future.result()
+            self._value = self.finish(value) if self.finish is not None else value
+            self._finished = True
+        return self._value
+
+
+class FrameLoader:
+    def __init__(self, cache_dir=None, workers=None):
+        self.cache_dir = cache_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+
+    def submit(self, root, prefix, frame_count, frames_per_direction, scale=1.0, direction_order=None):
+        future = self.executor.submit(load_atlas, root, prefix, frame_count, scale, self.cache_dir)
+        return LoadJob(future, partial(_finish_frames, frames_per_direction, direction_order))
+
+    def submit_call(self, fn, *args, finish=None):
+        return LoadJob(self.executor.submit(fn, *args), finish)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,67 +1,388 @@
 import json
 import os
+from bisect import bisect_left
+from pathlib import Path
 
+import numpy as np
 import pygame
 
+from adhess.distancefield import bake_distance_field, load_distance_field, save_distance_field
+from adhess.mapchunks import MemoryChunks
+from adhess.navgraph import build_nav_graph, load_nav_graph, save_nav_graph
+from adhess.utils import source_stamp
+
+COLLISION_CELL_SIZE = 128
+LINE_OF_SIGHT_MIN_STEP = 0.5
+# Grid cells packed into one integer for np.unique, x in the high half and y offset to stay positive
+_CELL_KEY_SPAN = 1 << 32
+_CELL_KEY_OFFSET = 1 << 31
+
 
 def _clamp(value, minimum, maximum):
     return max(minimum, min(value, maximum))
 
 
+def read_collision_data(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def parse_collision_entries(rects):
+    entries = []
+    for entry in rects:
+        rect_data = None
+        rect_type = "interior"
+        if isinstance(entry, dict):
+            rect_data = entry.get("rect") or entry.get("bounds") or entry.get("value")
+            rect_type = entry.get("type", rect_type)
+        else:
+            rect_data = entry
+
+        if not rect_data or len(rect_data) != 4:
+            continue
+
+        rect = pygame.Rect(*rect_data)
+        rect_type = str(rect_type).lower()
+        if rect_type not in {"interior", "exterior"}:
+            rect_type = "interior"
+        entries.append((rect, rect_type))
+    return entries
+
+
+def index_collision_entries(entries):
+    indexed_by_type = {}
+    for index, (rect, rect_type) in enumerate(entries):
+        indexed_by_type.setdefault(rect_type, []).append((index, rect))
+    return indexed_by_type
+
+
+def _cell_key(cell_x, cell_y):
+    return cell_x * _CELL_KEY_SPAN + (cell_y + _CELL_KEY_OFFSET)
+
+
+class RectGrid:
+    # Compressed rows: sorted cell keys, cell i owns members[offsets[i]:offsets[i + 1]]
+    def __init__(self, keys, offsets, members, cell_size=COLLISION_CELL_SIZE):
+        self.keys = keys
+        self.offsets = offsets
+        self.members = members
+        self.cell_size = cell_size
+        # Single box queries go through memoryviews, numpy's per call cost outweighs a short bisect
+        self._views = (memoryview(keys), memoryview(offsets), memoryview(members))
+
+    @classmethod
+    def from_rects(cls, indexed_rects, cell_size=COLLISION_CELL_SIZE):
+        buckets = {}
+        for index, rect in indexed_rects:
+            for cell_x in range(rect.left // cell_size, rect.right // cell_size + 1):
+                for cell_y in range(rect.top // cell_size, rect.bottom // cell_size + 1):
+                    buckets.setdefault((cell_x, cell_y), []).append(index)
+        cells = sorted(buckets.items())
+        keys = np.array([_cell_key(cell_x, cell_y) for (cell_x, cell_y), _ in cells], dtype=np.int64)
+        offsets = np.zeros(len(cells) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(bucket) for _, bucket in cells])
+        members = np.array([index for _, bucket in cells for index in bucket], dtype=np.int32)
+        return cls(keys, offsets, members, cell_size)
+
+    @classmethod
+    def from_cells(cls, cells, members, cell_size=COLLISION_CELL_SIZE):
+        # Rows of (cell x, cell y, start, count) in key order with back to back runs, as cell_rows writes them
+        keys = _cell_key(cells[:, 0].astype(np.int64), cells[:, 1].astype(np.int64))
+        offsets = np.empty(len(cells) + 1, dtype=np.int64)
+        offsets[:-1] = cells[:, 2]
+        offsets[-1] = cells[-1, 2] + cells[-1, 3] if len(cells) else 0
+        return cls(keys, offsets, members, cell_size)
+
+    def cell_rows(self):
+        rows = np.empty((len(self.keys), 4), dtype=np.int64)
+        rows[:, 0] = self.keys // _CELL_KEY_SPAN
+        rows[:, 1] = self.keys % _CELL_KEY_SPAN - _CELL_KEY_OFFSET
+        rows[:, 2] = self.offsets[:-1]
+        rows[:, 3] = np.diff(self.offsets)
+        return rows
+
+    def query(self, left, top, right, bottom, found):
+        size = self.cell_size
+        keys, offsets, members = self._views
+        low_y = int(top // size)
+        high_y = int(bottom // size)
+        for cell_x in range(int(left // size), int(right // size) + 1):
+            # A column of cells is one run of keys, and so one run of members
+            column = cell_x * _CELL_KEY_SPAN + _CELL_KEY_OFFSET
+            first = bisect_left(keys, column + low_y)
+            last = bisect_left(keys, column + high_y + 1, first)
+            if first < last:
+                found.update(members[offsets[first]:offsets[last]].tolist())
+
+    def members_at(self, keys):
+        if not len(self.keys):
+            return self.members[:0]
+        positions = np.minimum(self.keys.searchsorted(keys), len(self.keys) - 1)
+        positions = positions[self.keys[positions] == keys]
+        starts = self.offsets[positions]
+        counts = self.offsets[positions + 1] - starts
+        # Concatenated ranges without a Python loop: each run restarts the arange at its own start
+        steps = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return self.members[steps + np.arange(len(steps))]
+
+
 class GameMap:
-    def __init__(self, image_path, collision_path=None):
+    def __init__(self, image_path, collision_path=None, chunks=None, collision_data=None):
         self.image_path = os.fspath(image_path)
         self.collision_path = os.fspath(collision_path) if collision_path else None
-        self.surface = pygame.image.load(self.image_path).convert_alpha()
-        self.rect = self.surface.get_rect(topleft=(0, 0))
+        if chunks is None:
+            chunks = MemoryChunks(pygame.image.load(self.image_path).convert())
+        self.chunks = chunks
+        self.rect = pygame.Rect((0, 0), chunks.size)
         self.playable_bounds = pygame.Rect(self.rect)
         self.collision_rects = []
         self.collision_entries = []
         self.collision_rects_by_type = {}
+        self.collision_grids = {}
+        self._grids_by_types = {}
+        self._bounds_by_types = {}
+        self._fields_by_types = {}
+        self._nav_graphs = {}
+        self._collision_chunks = {}
+        self._collision_chunk_styles = None
         self.bounds_padding = 0
         self.collision_margin = 3.0
 
-        if self.collision_path and os.path.exists(self.collision_path):
-            self._load_collision_data(self.collision_path)
+        if collision_data is None and self.collision_path and os.path.exists(self.collision_path):
+            collision_data = read_collision_data(self.collision_path)
+        if collision_data is not None:
+            self._load_collision_data(collision_data)
+
+    def _load_collision_data(self, data):
+        if not isinstance(data, dict):
+            self._load_collision_pack(data)
+            return
+        self._apply_bounds_settings(data.get("bounds_padding", 0), data.get("collision_margin"))
+        self._set_collision_entries(parse_collision_entries(data.get("rects", [])))
+        self._build_collision_index()
+
+    def _load_collision_pack(self, pack):
+        self._apply_bounds_settings(pack.bounds_padding, pack.collision_margin)
+        self._set_collision_entries((pygame.Rect(rect), rect_type) for rect, rect_type in pack.entries())
+        self._build_collision_index({rect_type: pack.grid(rect_type) for rect_type in pack.types}, pack.entry_bounds())
 
-    def _load_collision_data(self, path):
-        with open(path, "r", encoding="utf-8") as file:
-            data = json.load(file)
-        self.bounds_padding = max(0, int(data.get("bounds_padding", 0)))
-        margin = data.get("collision_margin")
+    def _apply_bounds_settings(self, bounds_padding, margin):
+        self.bounds_padding = max(0, int(bounds_padding))
         if margin is not None:
             self.collision_margin = max(0.0, float(margin))
         self.playable_bounds = self.rect.inflate(-self.bounds_padding * 2, -self.bounds_padding * 2)
         if self.playable_bounds.width < 0 or self.playable_bounds.height < 0:
             self.playable_bounds = pygame.Rect(self.rect)
-        rects = data.get("rects", [])
+
+    def _set_collision_entries(self, entries):
         self.collision_rects = []
         self.collision_entries = []
         self.collision_rects_by_type = {}
+        for rect, rect_type in entries:
+            self.collision_rects.append(rect)
+            self.collision_entries.append((rect, rect_type))
+            self.collision_rects_by_type.setdefault(rect_type, []).append(rect)
 
-        for entry in rects:
-            rect_data = None
-            rect_type = "interior"
-            if isinstance(entry, dict):
-                rect_data = entry.get("rect") or entry.get("bounds") or entry.get("value")
-                rect_type = entry.get("type", rect_type)
+    def _build_collision_index(self, grids=None, entry_bounds=None):
+        if grids is None:
+            grids = {rect_type: RectGrid.from_rects(items) for rect_type, items in index_collision_entries(self.collision_entries).items()}
+        self.collision_grids = grids
+        # Bounds of every entry by file index, the grids hand out indices into this array
+        if entry_bounds is None:
+            entry_bounds = [(rect.left, rect.top, rect.right, rect.bottom) for rect, _ in self.collision_entries]
+        self.entry_bounds = np.array(entry_bounds, dtype=float).reshape(-1, 4)
+        self._grids_by_types = {}
+        self._bounds_by_types = {}
+        self._fields_by_types = {}
+        self._nav_graphs = {}
+        self._collision_chunks = {}
+
+    def _collision_grids(self, collision_types):
+        if collision_types is not None:
+            collision_types = tuple(collision_types)
+        grids = self._grids_by_types.get(collision_types)
+        if grids is None:
+            if collision_types is None:
+                grids = list(self.collision_grids.values())
             else:
-                rect_data = entry
+                allowed = {str(type_name).lower() for type_name in collision_types}
+                grids = [grid for rect_type, grid in self.collision_grids.items() if rect_type in allowed]
+            self._grids_by_types[collision_types] = grids
+        return grids
 
-            if not rect_data or len(rect_data) != 4:
-                continue
+    def _collision_bounds(self, collision_types):
+        if collision_types is not None:
+            collision_types = tuple(collision_types)
+        bounds = self._bounds_by_types.get(collision_types)
+        if bounds is None:
+            rects = [(rect.left, rect.top, rect.right, rect.bottom) for rect in self.iter_collision_rects(collision_types)]
+            bounds = np.array(rects, dtype=float).reshape(-1, 4)
+            self._bounds_by_types[collision_types] = bounds
+        return bounds
 
-            rect = pygame.Rect(*rect_data)
-            rect_type = str(rect_type).lower()
-            if rect_type not in {"interior", "exterior"}:
-                rect_type = "interior"
+    def distance_field(self, collision_types=None):
+        key = tuple(collision_types) if collision_types is not None else None
+        field = self._fields_by_types.get(key)
+        if field is None:
+            bounds = self._collision_bounds(collision_types)
+            area = tuple(self.rect)
+            cache_path = self._cache_path(collision_types, "sdf.npz")
+            if cache_path is not None:
+                field = load_distance_field(cache_path, bounds, area)
+            if field is None:
+                field = bake_distance_field(bounds, area)
+                if cache_path is not None:
+                    save_distance_field(cache_path, field, bounds, area)
+            self._fields_by_types[key] = field
+        return field
 
-            self.collision_rects.append(rect)
-            self.collision_entries.append((rect, rect_type))
-            self.collision_rects_by_type.setdefault(rect_type, []).append(rect)
+    def nav_graph(self, collision_types=None, clearance=0.0):
+        key = (tuple(collision_types) if collision_types is not None else None, float(clearance))
+        graph = self._nav_graphs.get(key)
+        if graph is None:
+            boxes = self._collision_bounds(collision_types) + (-clearance, -clearance, clearance, clearance)
+            bounds = self.playable_bounds
+            area = (bounds.left + clearance, bounds.top + clearance, bounds.right - clearance, bounds.bottom - clearance)
+            cache_path = self._cache_path(collision_types, f"nav{clearance:g}.json")
+            stamp = None
+            if cache_path is not None and os.path.exists(self.collision_path):
+                stamp = source_stamp(self.collision_path)
+                graph = load_nav_graph(cache_path, stamp, boxes, area)
+            if graph is None:
+                graph = build_nav_graph(boxes, area)
+                if stamp is not None:
+                    save_nav_graph(cache_path, graph, stamp)
+            self._nav_graphs[key] = graph
+        return graph
+
+    def _cache_path(self, collision_types, suffix):
+        if not self.collision_path:
+            return None
+        if collision_types is None:
+            name = "all"
+        else:
+            name = "+".join(sorted({str(type_name).lower() for type_name in collision_types}))
+        path = Path(self.collision_path)
+        return path.with_name(f"{path.stem}.{name}.{suffix}")
+
+    def is_clear(self, position, radius, collision_types=None):
+        return self.distance_field(collision_types).clearance(position[0], position[1]) > radius
 
-    def draw(self, screen, camera, offset):
-        screen.blit(self.surface, (int(-camera.x + offset.x), int(-camera.y + offset.y)))
+    def is_spawn_valid(self, position, radius, collision_types=None):
+        bounds = self.playable_bounds
+        if not (bounds.left + radius <= position[0] <= bounds.right - radius):
+            return False
+        if not (bounds.top + radius <= position[1] <= bounds.bottom - radius):
+            return False
+        return self.is_clear(position, radius, collision_types)
+
+    def has_line_of_sight(self, start, end, collision_types=None, radius=0.0):
+        field = self.distance_field(collision_types)
+        start = pygame.Vector2(start)
+        offset = pygame.Vector2(end) - start
+        length = offset.length()
+        step = offset / length if length else offset
+        reach = radius + field.cell_size * 2
+        travelled = 0.0
+        # Sphere tracing: the field's lower bound skips open space, near a wall the rects give the exact distance
+        while True:
+            point = start + step * min(travelled, length)
+            free = field.clearance(point.x, point.y) - radius
+            if free <= field.cell_size:
+                free = self._wall_distance(point.x, point.y, reach, collision_types) - radius
+                if free <= 0:
+                    return False
+            if travelled >= length:
+                return True
+            # Walls are whole pixels, so a half pixel step can never cross one
+            travelled += max(free, LINE_OF_SIGHT_MIN_STEP)
+
+    def _wall_distance(self, x, y, reach, collision_types=None):
+        # Rects the grids leave out are farther than reach, so reach caps the result
+        found = set()
+        for grid in self._collision_grids(collision_types):
+            grid.query(x - reach, y - reach, x + reach, y + reach, found)
+        nearest = reach
+        for left, top, right, bottom in self.entry_bounds[sorted(found)].tolist():
+            gap_x = max(left - x, x - right, 0.0)
+            gap_y = max(top - y, y - bottom, 0.0)
+            nearest = min(nearest, (gap_x * gap_x + gap_y * gap_y) ** 0.5)
+        return nearest
+
+    def query_collision_indices(self, position, radius, collision_types=None, after=-1):
+        found = set()
+        left = position.x - radius
+        top = position.y - radius
+        right = position.x + radius
+        bottom = position.y + radius
+        for grid in self._collision_grids(collision_types):
+            grid.query(left, top, right, bottom, found)
+        return sorted(index for index in found if index > after)
+
+    def _visible_chunks(self, view, origin_x, origin_y):
+        size = self.chunks.chunk_size
+        # Only the chunks under the viewport are touched, so the cost follows the screen size
+        first_x = max(0, (view.left - origin_x) // size)
+        first_y = max(0, (view.top - origin_y) // size)
+        last_x = min((self.rect.width - 1) // size, (view.right - 1 - origin_x) // size)
+        last_y = min((self.rect.height - 1) // size, (view.bottom - 1 - origin_y) // size)
+        return [
+            ((chunk_x, chunk_y), (origin_x + chunk_x * size, origin_y + chunk_y * size))
+            for chunk_y in range(first_y, last_y + 1)
+            for chunk_x in range(first_x, last_x + 1)
+        ]
+
+    def draw(self, screen, camera, offset, area=None):
+        origin_x = int(-camera.x + offset.x)
+        origin_y = int(-camera.y + offset.y)
+        view = screen.get_rect() if area is None else pygame.Rect(area).clip(screen.get_rect())
+        if view.width <= 0 or view.height <= 0:
+            return
+        if area is None:
+            # Reads for the ring of chunks around the screen start before the camera gets there
+            size = self.chunks.chunk_size
+            ahead = self._visible_chunks(view.inflate(size * 2, size * 2), origin_x, origin_y)
+            self.chunks.prefetch(key for key, _ in ahead)
+            self.chunks.waiting.clear()
+        get_chunk = self.chunks.get
+        previous_clip = screen.get_clip()
+        if area is not None:
+            screen.set_clip(view)
+        screen.blits(
+            [(get_chunk(key), position) for key, position in self._visible_chunks(view, origin_x, origin_y)],
+            doreturn=False,
+        )
+        screen.set_clip(previous_clip)
+
+    def _build_collision_chunk(self, key, styles, default_style):
+        size = self.chunks.chunk_size
+        area = pygame.Rect(key[0] * size, key[1] * size, size, size)
+        entries = [(rect, rect_type) for rect, rect_type in self.collision_entries if area.colliderect(rect)]
+        if not entries:
+            return None
+        chunk = pygame.Surface(area.size, pygame.SRCALPHA)
+        for rect, rect_type in entries:
+            fill_color, outline_color = styles.get(rect_type, default_style)
+            local = rect.move(-area.x, -area.y)
+            pygame.draw.rect(chunk, fill_color, local)
+            pygame.draw.rect(chunk, outline_color, local, 2)
+        return chunk
+
+    def draw_collisions(self, screen, camera, offset, styles, default_style):
+        # The overlay lives in map space and is cut like the map, it is only redrawn when the collisions change
+        if styles != self._collision_chunk_styles:
+            self._collision_chunks = {}
+            self._collision_chunk_styles = styles
+        origin_x = int(-camera.x + offset.x)
+        origin_y = int(-camera.y + offset.y)
+        chunks = self._collision_chunks
+        blits = []
+        for key, position in self._visible_chunks(screen.get_rect(), origin_x, origin_y):
+            if key not in chunks:
+                chunks[key] = self._build_collision_chunk(key, styles, default_style)
+            if chunks[key] is not None:
+                blits.append((chunks[key], position))
+        screen.blits(blits, doreturn=False)
 
     def iter_collision_entries(self, collision_types=None):
         if collision_types is None:
@@ -93,16 +414,150 @@ class GameMap:
 
     def resolve_collisions(self, position, radius, collision_types=None):
         effective_radius = max(0.0, radius - self.collision_margin)
-        rects = list(self.iter_collision_rects(collision_types))
+        if self.is_clear(position, effective_radius, collision_types):
+            self.clamp_circle_to_bounds(position, effective_radius)
+            return
+        entries = self.collision_entries
         for _ in range(3):
             adjusted = False
-            for rect in rects:
-                if _resolve_circle_rect(position, effective_radius, rect):
+            # Visit rects in file order like a full scan; rects away from the circle are no-ops,
+            # so candidates are only re-queried after a push moves it
+            candidates = self.query_collision_indices(position, effective_radius, collision_types)
+            cursor = 0
+            while cursor < len(candidates):
+                index = candidates[cursor]
+                cursor += 1
+                if _resolve_circle_rect(position, effective_radius, entries[index][0]):
                     adjusted = True
+                    candidates = self.query_collision_indices(position, effective_radius, collision_types, index)
+                    cursor = 0
             if not adjusted:
                 break
         self.clamp_circle_to_bounds(position, effective_radius)
 
+    def sweep_circle(self, start, end, radius, collision_types=None):
+        effective_radius = max(0.0, radius - self.collision_margin)
+        position = pygame.Vector2(start)
+        motion = pygame.Vector2(end) - position
+        # Stop at the first contact, then slide once along the wall with what is left of the move
+        for _ in range(2):
+            length = motion.length()
+            if length == 0:
+                break
+            midpoint = position + motion * 0.5
+            candidates = self.query_collision_indices(midpoint, length * 0.5 + effective_radius, collision_types)
+            first_time = 1.0
+            first_rect = None
+            for index in candidates:
+                rect = self.collision_entries[index][0]
+                time = _sweep_circle_rect(position, motion, effective_radius, rect)
+                if time is not None and time < first_time:
+                    first_time = time
+                    first_rect = rect
+            if first_rect is None:
+                position += motion
+                break
+            # Back off slightly so the contact does not count as an overlap
+            travel = max(0.0, first_time * length - 0.01)
+            position += motion * (travel / length)
+            motion *= 1.0 - first_time
+            normal = position - pygame.Vector2(
+                _clamp(position.x, first_rect.left, first_rect.right),
+                _clamp(position.y, first_rect.top, first_rect.bottom),
+            )
+            if normal.length_squared() == 0:
+                break
+            normal.normalize_ip()
+            into_wall = motion.dot(normal)
+            if into_wall < 0:
+                motion -= normal * into_wall
+        return position
+
+    def clamp_circles_to_bounds(self, positions, radii):
+        bounds = self.playable_bounds
+        if bounds.width <= 0 or bounds.height <= 0:
+            return
+        axes = ((0, bounds.left, bounds.right, bounds.centerx), (1, bounds.top, bounds.bottom, bounds.centery))
+        for axis, low, high, center in axes:
+            minimum = low + radii
+            maximum = high - radii
+            collapsed = minimum > maximum
+            minimum = np.where(collapsed, center, minimum)
+            maximum = np.where(collapsed, center, maximum)
+            positions[:, axis] = np.maximum(minimum, np.minimum(positions[:, axis], maximum))
+
+    def _batch_candidates(self, points, radii, collision_types):
+        found = set()
+        lows = points - radii[:, None]
+        highs = points + radii[:, None]
+        grids = self._collision_grids(collision_types)
+        if len(points) <= 8:
+            for (left, top), (right, bottom) in zip(lows.tolist(), highs.tolist()):
+                for grid in grids:
+                    grid.query(left, top, right, bottom, found)
+            return found
+        for grid in grids:
+            size = grid.cell_size
+            low = np.floor(lows / size).astype(np.int64)
+            span = np.floor(highs / size).astype(np.int64) - low
+            # Every grid cell under any circle's box, packed into one integer so each distinct cell is looked up once
+            keys = []
+            for step_x in range(int(span[:, 0].max()) + 1):
+                for step_y in range(int(span[:, 1].max()) + 1):
+                    covered = low[(span[:, 0] >= step_x) & (span[:, 1] >= step_y)]
+                    keys.append(_cell_key(covered[:, 0] + step_x, covered[:, 1] + step_y))
+            found.update(grid.members_at(np.unique(np.concatenate(keys))).tolist())
+        return found
+
+    def resolve_collisions_batch(self, positions, radii, collision_types=None):
+        radii = np.maximum(0.0, np.asarray(radii, dtype=float) - self.collision_margin)
+        # Circles the field proves are clear of every wall skip the rect tests entirely
+        active = np.flatnonzero(self.distance_field(collision_types).clearances(positions) <= radii)
+        for _ in range(3):
+            if active.size == 0:
+                break
+            points = positions[active]
+            active_radii = radii[active]
+            # Broadphase through the grids, the narrow phase below only sees rects near the batch
+            nearby_set = self._batch_candidates(points, active_radii, collision_types)
+            if not nearby_set:
+                break
+            nearby = np.array(sorted(nearby_set), dtype=np.intp)
+            bounds = self.entry_bounds[nearby]
+            touching = _touching_rects(points, active_radii, bounds)
+            touched = np.flatnonzero(touching.any(axis=0))
+            if touched.size == 0:
+                break
+            # Rects are applied in file order like the scalar path; a circle keeps its initial
+            # touching set until a push moves it, after which every later rect is rechecked
+            moved = np.zeros(len(active), dtype=bool)
+            any_moved = False
+            column = int(touched[0])
+            while column < len(nearby):
+                candidates = (touching[:, column] | moved if any_moved else touching[:, column]).nonzero()[0]
+                if candidates.size:
+                    pushed = _resolve_circles_rect(points, active_radii, bounds[column], candidates)
+                    if pushed.size:
+                        moved[pushed] = True
+                        any_moved = True
+                        # A push can carry a circle next to rects the first query did not reach
+                        reached = self._batch_candidates(points[pushed], active_radii[pushed], collision_types)
+                        after = nearby[column]
+                        added = [index for index in reached - nearby_set if index > after]
+                        if added:
+                            nearby_set.update(added)
+                            added = np.array(added, dtype=np.intp)
+                            nearby = np.concatenate((nearby, added))
+                            order = np.argsort(nearby, kind="stable")
+                            nearby = nearby[order]
+                            bounds = self.entry_bounds[nearby]
+                            added_touching = _touching_rects(points, active_radii, self.entry_bounds[added])
+                            touching = np.concatenate((touching, added_touching), axis=1)[:, order]
+                column += 1
+            positions[active] = points
+            active = active[moved]
+        self.clamp_circles_to_bounds(positions, radii)
+
 
 def _resolve_circle_rect(position, radius, rect):
     closest_x = _clamp(position.x, rect.left, rect.right)
@@ -139,4 +594,119 @@ def _resolve_circle_rect(position, radius, rect):
     return True
 
 
+def _sweep_circle_rect(position, motion, radius, rect):
+    # Time of impact against the rect grown by the radius: two slabs plus four corner circles
+    if _circle_overlaps_rect(position.x, position.y, radius, rect):
+        # Already overlapping: block moves that go deeper, the push-out handles the rest
+        normal_x = position.x - _clamp(position.x, rect.left, rect.right)
+        normal_y = position.y - _clamp(position.y, rect.top, rect.bottom)
+        return 0.0 if motion.x * normal_x + motion.y * normal_y < 0 else None
+    times = [
+        _ray_box(position, motion, rect.left - radius, rect.top, rect.right + radius, rect.bottom),
+        _ray_box(position, motion, rect.left, rect.top - radius, rect.right, rect.bottom + radius),
+    ]
+    for corner_x, corner_y in ((rect.left, rect.top), (rect.right, rect.top), (rect.left, rect.bottom), (rect.right, rect.bottom)):
+        times.append(_ray_circle(position, motion, corner_x, corner_y, radius))
+    first = None
+    for time in times:
+        if time is None or (first is not None and time >= first):
+            continue
+        # Touching contacts only count when the circle is moving into the rect
+        contact_x = position.x + motion.x * time
+        contact_y = position.y + motion.y * time
+        normal_x = contact_x - _clamp(contact_x, rect.left, rect.right)
+        normal_y = contact_y - _clamp(contact_y, rect.top, rect.bottom)
+        if motion.x * normal_x + motion.y * normal_y < 0:
+            first = time
+    return first
+
+
+def _circle_overlaps_rect(x, y, radius, rect):
+    diff_x = x - _clamp(x, rect.left, rect.right)
+    diff_y = y - _clamp(y, rect.top, rect.bottom)
+    distance_sq = diff_x * diff_x + diff_y * diff_y
+    return distance_sq == 0 or distance_sq < radius * radius
+
+
+def _ray_box(position, motion, left, top, right, bottom):
+    enter = 0.0
+    leave = 1.0
+    for origin, delta, low, high in ((position.x, motion.x, left, right), (position.y, motion.y, top, bottom)):
+        if delta == 0:
+            if origin < low or origin > high:
+                return None
+            continue
+        near = (low - origin) / delta
+        far = (high - origin) / delta
+        if near > far:
+            near, far = far, near
+        enter = max(enter, near)
+        leave = min(leave, far)
+        if enter > leave:
+            return None
+    return enter
+
+
+def _ray_circle(position, motion, center_x, center_y, radius):
+    offset_x = position.x - center_x
+    offset_y = position.y - center_y
+    a = motion.x * motion.x + motion.y * motion.y
+    b = offset_x * motion.x + offset_y * motion.y
+    c = offset_x * offset_x + offset_y * offset_y - radius * radius
+    if b > 0:
+        return None
+    discriminant = b * b - a * c
+    if a == 0 or discriminant < 0:
+        return None
+    time = (-b - discriminant ** 0.5) / a
+    return time if 0 <= time <= 1 else None
+
+
+def _touching_rects(points, radii, bounds):
+    x = points[:, 0, None]
+    y = points[:, 1, None]
+    reach = radii[:, None]
+    return (
+        (bounds[:, 0] <= x + reach)
+        & (bounds[:, 2] >= x - reach)
+        & (bounds[:, 1] <= y + reach)
+        & (bounds[:, 3] >= y - reach)
+    )
+
+
+def _resolve_circles_rect(points, radii, bounds, candidates):
+    left, top, right, bottom = bounds
+    x = points[candidates, 0]
+    y = points[candidates, 1]
+    radius = radii[candidates]
+    diff_x = x - np.minimum(np.maximum(x, left), right)
+    diff_y = y - np.minimum(np.maximum(y, top), bottom)
+    distance_sq = diff_x * diff_x + diff_y * diff_y
+
+    inside = distance_sq == 0
+    # Loose squared test first, the exact distance check below only runs on the survivors
+    pushed = inside | (distance_sq < radius * radius * (1 + 1e-9))
+    if not pushed.any():
+        return candidates[pushed]
+
+    if inside.any():
+        # argmin keeps the first minimum, matching the scalar left, right, top, bottom tie order
+        depth = np.abs(np.stack((x - left, right - x, y - top, bottom - y))[:, inside])
+        axis = np.argmin(depth, axis=0)
+        r = radius[inside]
+        x[inside] = np.select((axis == 0, axis == 1), (left - r, right + r), x[inside])
+        y[inside] = np.select((axis == 2, axis == 3), (top - r, bottom + r), y[inside])
+
+    hit = np.flatnonzero(pushed & ~inside)
+    distance = np.sqrt(distance_sq[hit])
+    overlap = distance < radius[hit]
+    pushed[hit[~overlap]] = False
+    hit = hit[overlap]
+    distance = distance[overlap]
+    penetration = radius[hit] - distance
+    x[hit] += diff_x[hit] / distance * penetration
+    y[hit] += diff_y[hit] / distance * penetration
 
+    points[candidates, 0] = x
+    points[candidates, 1] = y
+    return candidates[pushed]
@@ -0,0 +1,161 @@
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pygame
+
+from adhess.constants import BACKGROUND_COLOR
+from adhess.utils import source_stamp
+
+CHUNK_VERSION = 1
+MAP_CHUNK_SIZE = 256
+# Maps at least this large are cut into chunk files and streamed instead of kept in memory
+MAP_STREAM_MIN_PIXELS = 4096 * 4096
+MAP_STREAM_BUDGET = 64
+
+
+def chunk_rects(size, chunk_size=MAP_CHUNK_SIZE):
+    width, height = size
+    for chunk_y in range(0, -(-height // chunk_size)):
+        for chunk_x in range(0, -(-width // chunk_size)):
+            rect = pygame.Rect(chunk_x * chunk_size, chunk_y * chunk_size, chunk_size, chunk_size)
+            yield (chunk_x, chunk_y), rect.clip((0, 0, width, height))
+
+
+class MemoryChunks:
+    def __init__(self, surface, chunk_size=MAP_CHUNK_SIZE):
+        self.size = surface.get_size()
+        self.chunk_size = chunk_size
+        # The background is opaque, plain convert() tiles blit without per-pixel alpha
+        self.chunks = {key: surface.subsurface(rect).convert() for key, rect in chunk_rects(self.size, chunk_size)}
+        self.waiting = set()
+
+    def get(self, key):
+        return self.chunks[key]
+
+    def prefetch(self, keys):
+        pass
+
+
+class StreamedChunks:
+    def __init__(self, directory, size, chunk_size=MAP_CHUNK_SIZE, budget=MAP_STREAM_BUDGET, loader=None):
+        self.directory = Path(directory)
+        self.size = tuple(size)
+        self.chunk_size = chunk_size
+        self.budget = budget
+        self.loader = loader
+        self.rects = dict(chunk_rects(self.size, chunk_size))
+        self.loaded = OrderedDict()
+        self.pending = {}
+        self.placeholders = {}
+        # Chunks drawn as a placeholder since their read was still in flight
+        self.waiting = set()
+
+    def get(self, key):
+        chunk = self.loaded.get(key)
+        if chunk is not None:
+            self.loaded.move_to_end(key)
+            return chunk
+        rect = self.rects[key]
+        if self.loader is None:
+            return self._store(key, _read_chunk(self.directory / _chunk_name(key)))
+        job = self.pending.get(key)
+        if job is None:
+            job = self.pending[key] = self.loader.submit_call(_read_chunk, self.directory / _chunk_name(key))
+        if not job.done():
+            # Never wait on the disk while drawing, the tile shows up on a later frame
+            self.waiting.add(key)
+            return self._placeholder(rect.size)
+        del self.pending[key]
+        return self._store(key, job.result())
+
+    def prefetch(self, keys):
+        if self.loader is None:
+            return
+        keys = set(keys)
+        for key in list(self.pending):
+            if key not in keys:
+                del self.pending[key]
+        for key in keys:
+            if key not in self.loaded and key not in self.pending:
+                self.pending[key] = self.loader.submit_call(_read_chunk, self.directory / _chunk_name(key))
+
+    def _store(self, key, pixels):
+        chunk = pygame.image.frombuffer(pixels, self.rects[key].size, "RGB").convert()
+        self.loaded[key] = chunk
+        self.waiting.discard(key)
+        while len(self.loaded) > self.budget:
+            self.loaded.popitem(last=False)
+        return chunk
+
+    def _placeholder(self, size):
+        placeholder = self.placeholders.get(size)
+        if placeholder is None:
+            placeholder = pygame.Surface(size).convert()
+            placeholder.fill(BACKGROUND_COLOR)
+            self.placeholders[size] = placeholder
+        return placeholder
+
+
+def _read_chunk(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def _chunk_name(key):
+    return f"{key[0]}_{key[1]}.rgb"
+
+
+def _read_chunk_index(directory, stamp, chunk_size):
+    try:
+        with open(Path(directory) / "index.json", "r", encoding="utf-8") as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != CHUNK_VERSION or index.get("source") != stamp or index.get("chunk_size") != chunk_size:
+        return None
+    return index
+
+
+def write_chunk_files(pixels, size, directory, stamp, chunk_size=MAP_CHUNK_SIZE):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    width, height = size
+    image = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 4)[:, :, :3]
+    for key, rect in chunk_rects(size, chunk_size):
+        with open(directory / _chunk_name(key), "wb") as file:
+            file.write(np.ascontiguousarray(image[rect.top:rect.bottom, rect.left:rect.right]).tobytes())
+    # The index goes last so an interrupted split is simply redone
+    index = {"version": CHUNK_VERSION, "source": stamp, "size": [width, height], "chunk_size": chunk_size}
+    with open(directory / "index.json", "w", encoding="utf-8") as file:
+        json.dump(index, file)
+    return index
+
+
+def read_map_chunks(image_path, cache_dir=None, chunk_size=MAP_CHUNK_SIZE):
+    if cache_dir is not None:
+        stamp = list(source_stamp(image_path))
+        index = _read_chunk_index(cache_dir, stamp, chunk_size)
+        if index is not None:
+            return "stream", (cache_dir, index["size"])
+    surface = pygame.image.load(os.fspath(image_path))
+    size = surface.get_size()
+    pixels = pygame.image.tobytes(surface, "RGBA")
+    if cache_dir is not None and size[0] * size[1] >= MAP_STREAM_MIN_PIXELS:
+        try:
+            write_chunk_files(pixels, size, cache_dir, stamp, chunk_size)
+            return "stream", (cache_dir, size)
+        except OSError:
+            pass
+    return "memory", (pixels, size)
+
+
+def finish_map_chunks(decoded, chunk_size=MAP_CHUNK_SIZE, loader=None):
+    mode, payload = decoded
+    if mode == "stream":
+        directory, size = payload
+        return StreamedChunks(directory, size, chunk_size, loader=loader)
+    pixels, size = payload
+    return MemoryChunks(pygame.image.frombuffer(pixels, size, "RGBA"), chunk_size)
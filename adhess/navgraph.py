@@ -0,0 +1,239 @@
+import heapq
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+from adhess.utils import write_file_atomic
+
+NAV_VERSION = 1
+NAV_CELL_SIZE = 32
+NAV_PATH_CACHE_SIZE = 256
+# Corners sit just outside the inflated rects so paths can slide along their edges
+_CORNER_SLACK = 1.0
+
+
+# Segment x box pairs tested at once, bounds the temporary arrays whatever the map size
+NAV_BLOCK_ELEMENTS = 1 << 18
+# Segments per block, small blocks of nearby nodes keep the box bounds tight
+NAV_SEGMENT_BLOCK = 64
+# Node pairs handed to segments_blocked at a time while building the edges
+NAV_PAIR_BLOCK = 1 << 14
+
+
+def _boxes_near(starts, ends, boxes):
+    # A box outside the bounds of every segment in the block cannot block any of them
+    low = np.minimum(starts, ends).min(axis=0)
+    high = np.maximum(starts, ends).max(axis=0)
+    near = (boxes[:, 0] < high[0]) & (boxes[:, 2] > low[0]) & (boxes[:, 1] < high[1]) & (boxes[:, 3] > low[1])
+    return boxes[near]
+
+
+def _segments_cross(starts, ends, boxes):
+    blocked = np.zeros(len(starts), dtype=bool)
+    if len(boxes) == 0:
+        return blocked
+    # Only pairs whose bounds overlap go through the slab test
+    low = np.minimum(starts, ends)
+    high = np.maximum(starts, ends)
+    overlap = (boxes[:, 0] < high[:, 0, None]) & (boxes[:, 2] > low[:, 0, None])
+    overlap &= (boxes[:, 1] < high[:, 1, None]) & (boxes[:, 3] > low[:, 1, None])
+    segment, box = np.nonzero(overlap)
+    if segment.size == 0:
+        return blocked
+    enter = np.zeros(len(segment))
+    leave = np.ones(len(segment))
+    for axis in (0, 1):
+        origin = starts[segment, axis]
+        delta = ends[segment, axis] - origin
+        low = boxes[box, axis]
+        high = boxes[box, axis + 2]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            near = (low - origin) / delta
+            far = (high - origin) / delta
+        near, far = np.minimum(near, far), np.maximum(near, far)
+        # A segment parallel to this axis only crosses the open box when it already lies strictly inside the slab
+        still = delta == 0
+        inside = (low < origin) & (origin < high)
+        near = np.where(still, np.where(inside, -np.inf, np.inf), near)
+        far = np.where(still, np.where(inside, np.inf, -np.inf), far)
+        np.maximum(enter, near, out=enter)
+        np.minimum(leave, far, out=leave)
+    blocked[segment[enter < leave]] = True
+    return blocked
+
+
+def segments_blocked(starts, ends, boxes):
+    blocked = np.zeros(len(starts), dtype=bool)
+    if len(boxes) == 0 or len(starts) == 0:
+        return blocked
+    block = max(1, min(NAV_SEGMENT_BLOCK, NAV_BLOCK_ELEMENTS // len(boxes)))
+    for offset in range(0, len(starts), block):
+        chunk = slice(offset, offset + block)
+        chunk_starts = starts[chunk]
+        chunk_ends = ends[chunk]
+        blocked[chunk] = _segments_cross(chunk_starts, chunk_ends, _boxes_near(chunk_starts, chunk_ends, boxes))
+    return blocked
+
+
+def build_nav_nodes(boxes, area):
+    left, top, right, bottom = area
+    corners = []
+    for box_left, box_top, box_right, box_bottom in boxes:
+        for x in (box_left - _CORNER_SLACK, box_right + _CORNER_SLACK):
+            for y in (box_top - _CORNER_SLACK, box_bottom + _CORNER_SLACK):
+                corners.append((x, y))
+    nodes = np.array(corners, dtype=float).reshape(-1, 2)
+    if len(nodes) == 0:
+        return nodes
+    inside_area = (nodes[:, 0] >= left) & (nodes[:, 0] <= right) & (nodes[:, 1] >= top) & (nodes[:, 1] <= bottom)
+    covered = segments_blocked(nodes, nodes, boxes)
+    nodes = nodes[inside_area & ~covered]
+    # Z-order keeps neighbouring indices close on the map, so each block of segments only meets a few boxes
+    cells = np.maximum(nodes // NAV_CELL_SIZE, 0).astype(np.int64)
+    order = np.zeros(len(nodes), dtype=np.int64)
+    for bit in range(16):
+        order |= ((cells[:, 0] >> bit) & 1) << (2 * bit)
+        order |= ((cells[:, 1] >> bit) & 1) << (2 * bit + 1)
+    return nodes[np.argsort(order, kind="stable")]
+
+
+def _node_pairs(count, block=NAV_PAIR_BLOCK):
+    # Upper triangle of the node pairs, a few rows at a time instead of the whole triangle
+    row = 0
+    while row < count - 1:
+        rows = np.arange(row, count - 1)
+        lengths = count - 1 - rows
+        taken = max(1, int(np.searchsorted(np.cumsum(lengths), block, side="right")))
+        rows = rows[:taken]
+        lengths = lengths[:taken]
+        first = np.repeat(rows, lengths)
+        row_starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        yield first, first + 1 + np.arange(len(first)) - row_starts
+        row += taken
+
+
+def build_nav_edges(nodes, boxes):
+    edges = [np.zeros((0, 2), dtype=np.intp)]
+    for first, second in _node_pairs(len(nodes)):
+        clear = ~segments_blocked(nodes[first], nodes[second], boxes)
+        edges.append(np.column_stack((first[clear], second[clear])))
+    return np.concatenate(edges)
+
+
+class NavGraph:
+    def __init__(self, nodes, edges, boxes, area, cell_size=NAV_CELL_SIZE):
+        self.nodes = np.asarray(nodes, dtype=float).reshape(-1, 2)
+        self.edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+        self.boxes = boxes
+        self.area = area
+        self.cell_size = cell_size
+        self.neighbours = [[] for _ in range(len(self.nodes))]
+        lengths = np.hypot(*(self.nodes[self.edges[:, 0]] - self.nodes[self.edges[:, 1]]).T)
+        for (first, second), length in zip(self.edges.tolist(), lengths.tolist()):
+            self.neighbours[first].append((second, length))
+            self.neighbours[second].append((first, length))
+        self.paths = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def visible(self, start, end):
+        return not segments_blocked(np.array([start], dtype=float), np.array([end], dtype=float), self.boxes)[0]
+
+    def _visible_nodes(self, point):
+        if len(self.nodes) == 0:
+            return []
+        starts = np.repeat(np.array([point], dtype=float), len(self.nodes), axis=0)
+        clear = ~segments_blocked(starts, self.nodes, self.boxes)
+        return np.flatnonzero(clear).tolist()
+
+    def _search(self, start, goal):
+        if self.visible(start, goal):
+            return ()
+        goal_links = set(self._visible_nodes(goal))
+        if not goal_links:
+            return None
+        nodes = self.nodes
+        goal_point = np.array(goal, dtype=float)
+        heuristic = np.hypot(*(nodes - goal_point).T).tolist()
+        best = {}
+        previous = {}
+        queue = []
+        for index in self._visible_nodes(start):
+            cost = float(np.hypot(*(nodes[index] - start)))
+            best[index] = cost
+            previous[index] = None
+            heapq.heappush(queue, (cost + heuristic[index], cost, index))
+        while queue:
+            _, cost, index = heapq.heappop(queue)
+            if cost > best[index]:
+                continue
+            if index in goal_links:
+                route = []
+                while index is not None:
+                    route.append(index)
+                    index = previous[index]
+                return tuple(reversed(route))
+            for neighbour, length in self.neighbours[index]:
+                new_cost = cost + length
+                if new_cost < best.get(neighbour, float("inf")):
+                    best[neighbour] = new_cost
+                    previous[neighbour] = index
+                    heapq.heappush(queue, (new_cost + heuristic[neighbour], new_cost, neighbour))
+        return None
+
+    def _cell(self, point):
+        return int(point[0] // self.cell_size), int(point[1] // self.cell_size)
+
+    def _route_fits(self, route, start, goal):
+        if not route:
+            return self.visible(start, goal)
+        return self.visible(start, self.nodes[route[0]]) and self.visible(self.nodes[route[-1]], goal)
+
+    def find_path(self, start, goal):
+        start = (float(start[0]), float(start[1]))
+        goal = (float(goal[0]), float(goal[1]))
+        key = (self._cell(start), self._cell(goal))
+        route = self.paths.get(key, False)
+        if route is not False and (route is None or self._route_fits(route, start, goal)):
+            self.hits += 1
+            self.paths.move_to_end(key)
+        else:
+            self.misses += 1
+            route = self._search(start, goal)
+            self.paths[key] = route
+            if len(self.paths) > NAV_PATH_CACHE_SIZE:
+                self.paths.popitem(last=False)
+        if route is None:
+            return None
+        return [tuple(self.nodes[index].tolist()) for index in route] + [goal]
+
+
+def build_nav_graph(boxes, area, cell_size=NAV_CELL_SIZE):
+    nodes = build_nav_nodes(boxes, area)
+    return NavGraph(nodes, build_nav_edges(nodes, boxes), boxes, area, cell_size)
+
+
+def load_nav_graph(path, stamp, boxes, area, cell_size=NAV_CELL_SIZE):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != NAV_VERSION or data.get("source") != list(stamp):
+        return None
+    if data.get("boxes") != boxes.tolist() or data.get("area") != list(area):
+        return None
+    return NavGraph(data["nodes"], data["edges"], boxes, area, cell_size)
+
+
+def save_nav_graph(path, graph, stamp):
+    data = {
+        "version": NAV_VERSION,
+        "source": list(stamp),
+        "area": list(graph.area),
+        "boxes": graph.boxes.tolist(),
+        "nodes": graph.nodes.tolist(),
+        "edges": graph.edges.tolist(),
+    }
+    write_file_atomic(path, lambda file: json.dump(data, file), "w")
@@ -0,0 +1,42 @@
+LAYER_GROUND = 0
+LAYER_ENTITIES = 1
+LAYER_EFFECTS = 2
+
+
+class RenderQueue:
+    def __init__(self):
+        self.order = []
+        self.items = {}
+
+    def submit(self, ident, layer, key, blits):
+        self.items[ident] = ((layer, key), blits)
+
+    def flush(self, target):
+        items = self.items
+        # Start from last frame's order so the list is already almost sorted
+        order = [ident for ident in self.order if ident in items]
+        if len(order) < len(items):
+            known = set(order)
+            order.extend(ident for ident in items if ident not in known)
+
+        # Insertion sort, linear when only a few entities swapped places since the last frame
+        keys = [items[ident][0] for ident in order]
+        for index in range(1, len(order)):
+            key = keys[index]
+            ident = order[index]
+            position = index - 1
+            while position >= 0 and keys[position] > key:
+                keys[position + 1] = keys[position]
+                order[position + 1] = order[position]
+                position -= 1
+            keys[position + 1] = key
+            order[position + 1] = ident
+
+        batch = []
+        for ident in order:
+            batch.extend(items[ident][1])
+        self.order = order
+        self.items = {}
+        if not batch:
+            return []
+        return target.blits(batch)
@@ -0,0 +1,88 @@
+import pygame
+
+UI_HIT_CELL_SIZE = 64
+
+
+class Label:
+    def __init__(self, surface, **anchor):
+        self.surface = surface
+        self.rect = surface.get_rect(**anchor)
+
+    def draw(self, target):
+        target.blit(self.surface, self.rect)
+
+
+class Box:
+    def __init__(self, rect, color, border_color=None, border_radius=0, children=()):
+        self.rect = pygame.Rect(rect)
+        self.color = color
+        self.border_color = border_color
+        self.border_radius = border_radius
+        self.children = list(children)
+
+    def draw(self, target):
+        pygame.draw.rect(target, self.color, self.rect, border_radius=self.border_radius)
+        if self.border_color is not None:
+            pygame.draw.rect(target, self.border_color, self.rect, width=2, border_radius=self.border_radius)
+        for child in self.children:
+            child.draw(target)
+
+
+class Menu:
+    def __init__(self, size, backdrop=(0, 0, 0, 0)):
+        self.size = size
+        self.backdrop = backdrop
+        self.children = []
+        self.buttons = []
+        self.hit_cells = {}
+        self.layer = None
+
+    def add(self, widget):
+        self.children.append(widget)
+        return widget
+
+    def add_button(self, widget):
+        index = len(self.buttons)
+        self.buttons.append(widget.rect)
+        rect = widget.rect
+        for cell_x in range(rect.left // UI_HIT_CELL_SIZE, (rect.right - 1) // UI_HIT_CELL_SIZE + 1):
+            for cell_y in range(rect.top // UI_HIT_CELL_SIZE, (rect.bottom - 1) // UI_HIT_CELL_SIZE + 1):
+                self.hit_cells.setdefault((cell_x, cell_y), []).append(index)
+        return self.add(widget)
+
+    def hit_test(self, position):
+        x, y = position
+        for index in self.hit_cells.get((x // UI_HIT_CELL_SIZE, y // UI_HIT_CELL_SIZE), ()):
+            if self.buttons[index].collidepoint(x, y):
+                return index
+        return None
+
+    def draw(self, screen):
+        if self.layer is None:
+            # Everything is composited once, later frames are a single blit
+            self.layer = pygame.Surface(self.size, pygame.SRCALPHA)
+            self.layer.fill(self.backdrop)
+            for child in self.children:
+                child.draw(self.layer)
+        return screen.blit(self.layer, (0, 0))
+
+
+class MenuCache:
+    def __init__(self):
+        self.menus = {}
+
+    def get(self, name, key, build):
+        entry = self.menus.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, build())
+            self.menus[name] = entry
+        return entry[1]
+
+    def hit_test(self, name, position):
+        entry = self.menus.get(name)
+        if entry is None:
+            return None
+        return entry[1].hit_test(position)
+
+    def forget(self, name):
+        self.menus.pop(name, None)
@@ -1,3 +1,6 @@
+import os
+from pathlib import Path
+
 import pygame
 
 
@@ -8,3 +11,26 @@ def vector_to_direction_index(vector):
     if abs(x) > abs(y):
         return 2 if x > 0 else 1
     return 0 if y >= 0 else 3
+
+
+def hit_rate(hits, misses):
+    total = hits + misses
+    return hits / total if total else 0.0
+
+
+def source_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def write_file_atomic(path, write, mode="wb"):
+    # Written next to the target then swapped in, so a reader never sees half a cache file
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp_path, mode, encoding=None if "b" in mode else "utf-8") as file:
+            write(file)
+        os.replace(tmp_path, path)
+    except OSError:
+        return False
+    return True
@@ -0,0 +1,165 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from adhess.collisionpack import load_collision_pack
+from adhess.map import GameMap, _resolve_circle_rect
+from adhess.mapchunks import MemoryChunks
+
+MAP_COLLISIONS = Path(__file__).resolve().parent.parent / "assets" / "maps" / "2_collisions.json"
+COLLISION_TYPES = (None, ("interior",), ("interior", "exterior"), ("exterior",))
+
+
+def make_map(collision_path, collision_data=None, size=(512, 512)):
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    chunks = MemoryChunks(pygame.Surface(size))
+    return GameMap("missing.png", collision_path, chunks, collision_data)
+
+
+def make_level_map(tmp_path):
+    collision_path = tmp_path / MAP_COLLISIONS.name
+    shutil.copy(MAP_COLLISIONS, collision_path)
+    return make_map(collision_path, size=(2048, 2048))
+
+
+def random_circles(game_map, rng, count, collision_types):
+    positions = rng.uniform(-50, game_map.rect.width + 50, (count, 2))
+    rects = list(game_map.iter_collision_rects(collision_types))
+    # A third around the walls and a third starting inside them
+    for index in range(0, count, 3):
+        rect = rects[rng.integers(len(rects))]
+        positions[index] = rng.uniform((rect.left - 30, rect.top - 30), (rect.right + 30, rect.bottom + 30))
+    for index in range(1, count, 3):
+        rect = rects[rng.integers(len(rects))]
+        positions[index] = rng.uniform((rect.left, rect.top), (rect.right, rect.bottom))
+    return positions, rng.choice([3.0, 10.0, 18.0, 28.0, 40.0, 60.0], count)
+
+
+def test_missing_collision_file_gives_an_empty_map(tmp_path):
+    collision_path = tmp_path / "missing_collisions.json"
+    pack = load_collision_pack(collision_path)
+    assert pack.entries() == []
+
+    for collision_data in (pack, None):
+        game_map = make_map(collision_path, collision_data)
+        assert game_map.collision_rects == []
+        position = pygame.Vector2(100, 100)
+        game_map.resolve_collisions(position, 10)
+        assert position == pygame.Vector2(100, 100)
+
+
+def test_line_of_sight_stops_at_a_thin_wall(tmp_path):
+    collision_path = tmp_path / "thin_collisions.json"
+    collision_path.write_text(json.dumps({"rects": [{"type": "interior", "rect": [203, 0, 2, 512]}]}))
+    game_map = make_map(collision_path)
+    assert not game_map.has_line_of_sight((100, 100), (300, 100))
+    assert not game_map.has_line_of_sight((300, 260), (100, 250), radius=4)
+    assert game_map.has_line_of_sight((100, 100), (190, 300))
+    assert game_map.has_line_of_sight((250, 50), (250, 450), radius=4)
+
+
+def test_nav_graph_routes_around_a_wall_and_follows_the_collision_file(tmp_path, monkeypatch):
+    import adhess.map
+
+    builds = []
+    build_nav_graph = adhess.map.build_nav_graph
+    monkeypatch.setattr(adhess.map, "build_nav_graph", lambda *args: builds.append(args) or build_nav_graph(*args))
+    collision_path = tmp_path / "wall_collisions.json"
+    wall = {"rects": [{"type": "interior", "rect": [200, 0, 20, 400]}]}
+    collision_path.write_text(json.dumps(wall))
+
+    graph = make_map(collision_path).nav_graph(("interior",))
+    path = graph.find_path((100, 200), (300, 200))
+    assert path[-1] == (300.0, 200.0)
+    assert any(y > 400 for _, y in path)
+    points = [(100.0, 200.0)] + path
+    assert all(graph.visible(start, end) for start, end in zip(points, points[1:]))
+    assert graph.find_path((102, 198), (300, 200)) is not None
+    assert graph.hits == 1
+    assert len(builds) == 1
+
+    # Same file, the graph comes from the cache next to it
+    make_map(collision_path).nav_graph(("interior",))
+    assert len(builds) == 1
+
+    collision_path.write_text(json.dumps({"rects": []}) + "\n")
+    graph = make_map(collision_path).nav_graph(("interior",))
+    assert len(builds) == 2
+    assert graph.find_path((100, 200), (300, 200)) == [(300.0, 200.0)]
+
+
+def make_dense_map(tmp_path):
+    # Small rects packed closely, pushes keep carrying circles into rects the first grid query missed
+    rng = np.random.default_rng(2)
+    rects = [
+        {"type": ("interior", "exterior")[index % 2], "rect": [int(x), int(y), int(width), int(height)]}
+        for index, (x, y, width, height) in enumerate(
+            zip(rng.integers(0, 1000, 300), rng.integers(0, 1000, 300), rng.integers(4, 40, 300), rng.integers(4, 40, 300))
+        )
+    ]
+    collision_path = tmp_path / "dense_collisions.json"
+    collision_path.write_text(json.dumps({"rects": rects}))
+    return make_map(collision_path, size=(1024, 1024))
+
+
+def test_batch_resolve_matches_the_scalar_path(tmp_path):
+    rng = np.random.default_rng(7)
+    for game_map in (make_level_map(tmp_path), make_dense_map(tmp_path)):
+        for trial in range(30):
+            collision_types = COLLISION_TYPES[trial % len(COLLISION_TYPES)]
+            positions, radii = random_circles(game_map, rng, int(rng.integers(0, 120)), collision_types)
+            if trial % 5 == 0:
+                positions = np.round(positions)
+            expected = positions.copy()
+            for index in range(len(expected)):
+                position = pygame.Vector2(*expected[index])
+                game_map.resolve_collisions(position, radii[index], collision_types)
+                expected[index] = position
+            game_map.resolve_collisions_batch(positions, radii, collision_types)
+            assert np.array_equal(positions, expected)
+    empty = np.zeros((0, 2))
+    game_map.resolve_collisions_batch(empty, np.zeros(0))
+    assert empty.shape == (0, 2)
+
+
+def test_grid_resolve_matches_a_full_scan(tmp_path):
+    rng = np.random.default_rng(11)
+    for game_map in (make_level_map(tmp_path), make_dense_map(tmp_path)):
+        for trial in range(12):
+            collision_types = COLLISION_TYPES[trial % len(COLLISION_TYPES)]
+            rects = list(game_map.iter_collision_rects(collision_types))
+            positions, radii = random_circles(game_map, rng, 60, collision_types)
+            for (x, y), radius in zip(positions.tolist(), radii.tolist()):
+                position = pygame.Vector2(x, y)
+                game_map.resolve_collisions(position, radius, collision_types)
+                # The scan over every rect in file order that the grid replaced
+                expected = pygame.Vector2(x, y)
+                effective_radius = max(0.0, radius - game_map.collision_margin)
+                for _ in range(3):
+                    if not any([_resolve_circle_rect(expected, effective_radius, rect) for rect in rects]):
+                        break
+                game_map.clamp_circle_to_bounds(expected, effective_radius)
+                assert position == expected
+
+
+def test_mapped_pack_answers_like_the_json(tmp_path):
+    rng = np.random.default_rng(5)
+    for game_map in (make_level_map(tmp_path), make_dense_map(tmp_path)):
+        load_collision_pack(game_map.collision_path)
+        # The second load maps the pack written by the first
+        packed = make_map(game_map.collision_path, load_collision_pack(game_map.collision_path), game_map.rect.size)
+        assert packed.collision_entries == game_map.collision_entries
+        assert np.array_equal(packed.entry_bounds, game_map.entry_bounds)
+        for trial in range(200):
+            collision_types = COLLISION_TYPES[trial % len(COLLISION_TYPES)]
+            position = pygame.Vector2(*rng.uniform(-60, game_map.rect.width + 60, 2))
+            radius = float(rng.uniform(1, 300))
+            expected = game_map.query_collision_indices(position, radius, collision_types)
+            assert packed.query_collision_indices(position, radius, collision_types) == expected
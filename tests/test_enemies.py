@@ -0,0 +1,65 @@
+import numpy as np
+
+from adhess.entities.enemy import EnemyPool
+
+
+class PushingMap:
+    def __init__(self, rng):
+        self.rng = rng
+
+    def resolve_collisions_batch(self, positions, radii, collision_types=None):
+        positions += self.rng.uniform(-12, 12, positions.shape)
+
+
+def make_pool(rng, count):
+    pool = EnemyPool(8)
+    for position, radius in zip(rng.uniform(0, 600, (count, 2)), rng.uniform(6, 30, count)):
+        pool.spawn(position, None, radius)
+    return pool
+
+
+def check_queries(pool, rng):
+    position = pool.position[: pool.count]
+    radius = pool.radius[: pool.count]
+    for _ in range(10):
+        center = rng.uniform(-50, 650, 2)
+        reach = rng.uniform(0, 120)
+        distance = np.hypot(*(position - center).T)
+        assert sorted(pool.overlapping(center, reach).tolist()) == np.flatnonzero(distance <= radius + reach).tolist()
+        assert sorted(pool.neighbours(center, reach).tolist()) == np.flatnonzero(distance <= reach).tolist()
+
+
+def test_grid_queries_match_brute_force():
+    rng = np.random.default_rng(3)
+    for trial in range(60):
+        pool = make_pool(rng, int(rng.integers(0, 120)))
+        check_queries(pool, rng)
+
+        first, second = pool.spatial_grid().pairs()
+        found = set(zip(first.tolist(), second.tolist()))
+        position = pool.position[: pool.count]
+        radius = pool.radius[: pool.count]
+        for i in range(pool.count):
+            for j in range(i + 1, pool.count):
+                if np.hypot(*(position[i] - position[j])) < radius[i] + radius[j]:
+                    assert (i, j) in found or (j, i) in found
+
+        # After the separation and wall pushes the grid is reused, widened by how far anything moved
+        pool.separate()
+        pool.resolve_collisions(PushingMap(rng))
+        assert pool.grid_valid or pool.count == 0
+        check_queries(pool, rng)
+
+
+def test_one_grid_build_per_tick():
+    rng = np.random.default_rng(5)
+    pool = make_pool(rng, 80)
+    builds = []
+    build = pool.grid.build
+    pool.grid.build = lambda *args: builds.append(1) or build(*args)
+    for _ in range(5):
+        pool.update(1 / 60, (300.0, 300.0))
+        pool.separate()
+        pool.resolve_collisions(PushingMap(rng))
+        pool.attack((300.0, 300.0), 20)
+    assert len(builds) == 5